@@ -6,6 +6,7 @@ from jose import JWTError, jwt
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 import logging
+from backend.executors import run_password_task
 
 # 设置日志
 logger = logging.getLogger(__name__)
@@ -34,6 +35,14 @@ def get_password_hash(password):
     """获取密码哈希值"""
     return pwd_context.hash(password)
 
+async def verify_password_async(plain_password, hashed_password):
+    """在密码线程池中验证密码，不阻塞事件循环"""
+    return await run_password_task(verify_password, plain_password, hashed_password)
+
+async def get_password_hash_async(password):
+    """在密码线程池中计算密码哈希，不阻塞事件循环"""
+    return await run_password_task(get_password_hash, password)
+
 def create_access_token(data: dict):
     """创建访问令牌"""
     try:
@@ -52,7 +61,8 @@ def decode_token(token):
         payload = jwt.decode(token, JWT_SECRET, algorithms=[ALGORITHM])
         return payload
     except JWTError as e:
-        logger.error(f"JWT decode error: {str(e)}")
+        # 过期或伪造的令牌属于正常情况，由调用方决定如何记录
+        logger.debug("JWT decode error: %s", e)
         raise Exception(f"Could not validate credentials: {str(e)}")
     except Exception as e:
         logger.error(f"Token decode error: {str(e)}")
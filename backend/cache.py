@@ -0,0 +1,110 @@
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Callable, Hashable, Optional, Tuple
+import hashlib
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+# 每个科目的版本号，任何写入都会加一；缓存键中包含版本号，旧版本的条目自然失效
+VERSION_KEY = "version:{subject}"
+# 所有科目共用的版本号，任意科目有写入时加一（科目列表等跨科目的数据使用）
+GLOBAL_VERSION_KEY = "leaderboards:version"
+# 科目最后一次写入（版本号变化）的时间，用于 Last-Modified
+UPDATED_KEY = "updated:{subject}"
+
+
+def subject_version(store: Any, subject: str) -> int:
+    """读取科目当前的版本号，从未写入过时为 0"""
+    return int(store.get(VERSION_KEY.format(subject=subject)) or 0)
+
+
+def global_version(store: Any) -> int:
+    return int(store.get(GLOBAL_VERSION_KEY) or 0)
+
+
+def bump_version(store: Any, subject: str):
+    """科目数据变化后调用，store 也可以是管道（随其他写入一起提交）"""
+    store.incr(GLOBAL_VERSION_KEY)
+    version = store.incr(VERSION_KEY.format(subject=subject))
+    # 在版本号之后写入：读到新的时间时，版本号一定已经变化
+    store.set(UPDATED_KEY.format(subject=subject), datetime.now().isoformat())
+    return version
+
+
+def subject_updated_at(store: Any, subject: str) -> Optional[str]:
+    """科目最后一次写入的时间（ISO 格式，本地时间），从未写入过时为 None"""
+    return store.get(UPDATED_KEY.format(subject=subject))
+
+
+def make_etag(key: Hashable) -> str:
+    """由缓存键（包含版本号）生成 ETag，版本号或参数不同时 ETag 不同"""
+    return '"' + hashlib.sha1(repr(key).encode("utf-8")).hexdigest()[:20] + '"'
+
+
+class RenderCache:
+    """按内存大小限制的 LRU 缓存，用于保存计算好的排行榜数据和渲染好的页面
+
+    同一科目同一版本的页面只渲染一次，之后的请求直接返回缓存的内容。
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[Hashable, Tuple[Any, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: Hashable, value: Any, size: int) -> None:
+        """写入一个条目，size 为其大致占用的字节数；超过上限的条目不缓存"""
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.current_bytes -= old[1]
+            self._entries[key] = (value, size)
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.current_bytes -= evicted_size
+                self.evictions += 1
+
+    def get_or_create(self, key: Hashable, create: Callable[[], Tuple[Any, int]]) -> Any:
+        """缓存命中时直接返回，否则调用 create() 得到 (值, 字节数) 并写入缓存"""
+        value = self.get(key)
+        if value is None:
+            value, size = create()
+            self.put(key, value, size)
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "bytes": self.current_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
@@ -11,12 +11,55 @@ DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./leaderboard.db")
 REDIS_HOST = os.getenv("REDIS_HOST", "localhost")
 REDIS_PORT = int(os.getenv("REDIS_PORT", "6379"))
 REDIS_PASSWORD = os.getenv("REDIS_PASSWORD", None)
+REDIS_DB = int(os.getenv("REDIS_DB", "0"))
+REDIS_MAX_CONNECTIONS = int(os.getenv("REDIS_MAX_CONNECTIONS", "50"))
+
+# 排行榜存储后端: local（进程内存储）或 redis（多进程共享）
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "local").lower()
+
+# 本地存储的持久化目录，为空时不持久化（重启后数据丢失）
+LOCAL_STORE_DIR = os.getenv("LOCAL_STORE_DIR", "")
+# 快照间隔（秒）和写日志刷盘间隔（秒）
+SNAPSHOT_INTERVAL = float(os.getenv("SNAPSHOT_INTERVAL", "300"))
+LOG_FSYNC_INTERVAL = float(os.getenv("LOG_FSYNC_INTERVAL", "1"))
+
+# 上传文件解析进程池大小，0 表示在线程中解析（不使用子进程）
+PARSE_WORKERS = int(os.getenv("PARSE_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+# 合并评委文件（重新计算学生成绩并写入存储）的线程数
+MERGE_WORKERS = int(os.getenv("MERGE_WORKERS", "2"))
+
+# 排行榜页面渲染缓存的内存上限（字节）
+RENDER_CACHE_MAX_BYTES = int(os.getenv("RENDER_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+
+# 密码哈希（bcrypt）线程数，以及等待中的请求数上限（超过时返回 503）
+PASSWORD_WORKERS = int(os.getenv("PASSWORD_WORKERS", str(min(2, os.cpu_count() or 1))))
+PASSWORD_MAX_WAITING = int(os.getenv("PASSWORD_MAX_WAITING", "100"))
+
+# 已验证令牌的缓存：最多条目数和有效期（秒）
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "1024"))
+TOKEN_CACHE_TTL = float(os.getenv("TOKEN_CACHE_TTL", "300"))
+
+# 导入任务在最后一次更新后保留的时间（秒），之后创建新任务或重启时删除
+IMPORT_JOB_TTL = int(os.getenv("IMPORT_JOB_TTL", "86400"))
+
+# 启动时从 SQLite 预热排行榜存储，每次读取的行数
+WARMUP_CHUNK_SIZE = int(os.getenv("WARMUP_CHUNK_SIZE", "5000"))
+
+# 管理员用户名（逗号分隔），可以使用 /admin/profile 等管理接口
+ADMIN_USERS = {name.strip() for name in os.getenv("ADMIN_USERS", "").split(",") if name.strip()}
+# 采样分析的最长时间（秒）
+PROFILE_MAX_SECONDS = float(os.getenv("PROFILE_MAX_SECONDS", "60"))
 
 # JWT 配置
 JWT_SECRET = os.getenv("JWT_SECRET", "your-secret-key")
 JWT_ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
+# 日志级别，以及按模块覆盖的级别（如 "backend.storage=WARNING,uvicorn.access=WARNING"）
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+LOG_LEVELS = os.getenv("LOG_LEVELS", "")
+
 # 调试模式
 DEBUG = os.getenv("DEBUG", "True").lower() == "true"
 
@@ -1,4 +1,4 @@
-from sqlalchemy import create_engine, Column, Integer, String, Float, ForeignKey, DateTime
+from sqlalchemy import create_engine, Column, Integer, String, Float, ForeignKey, DateTime, Index, event, inspect, text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from datetime import datetime
@@ -7,6 +7,18 @@ from .config import DATABASE_URL
 # Create the SQLAlchemy engine
 engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False} if DATABASE_URL.startswith('sqlite') else {})
 
+if DATABASE_URL.startswith('sqlite'):
+    @event.listens_for(engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        # WAL 模式下导入成绩时读取不会被阻塞；WAL 下 synchronous=NORMAL 崩溃后数据库仍保持一致
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute("PRAGMA busy_timeout=5000")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.execute("PRAGMA cache_size=-16000")
+        cursor.close()
+
 # Create a SessionLocal class for database sessions
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
@@ -39,9 +51,27 @@ class Score(Base):
     subject = Column(String, index=True)
     score = Column(Float)
     timestamp = Column(DateTime, default=datetime.utcnow)
+    # 导入的评委文件中的分数：对应的学生和文件名（手动提交的分数为空）
+    student_id = Column(Integer, ForeignKey("students.id"), index=True)
+    sheet = Column(String)
+
+    __table_args__ = (Index("ix_scores_subject_sheet", "subject", "sheet"),)
+
+def migrate_schema():
+    """为旧版本创建的数据库补充新增的列和索引（create_all 不会修改已存在的表）"""
+    columns = {column["name"] for column in inspect(engine).get_columns("scores")}
+    with engine.begin() as connection:
+        if "student_id" not in columns:
+            connection.execute(text("ALTER TABLE scores ADD COLUMN student_id INTEGER REFERENCES students (id)"))
+        if "sheet" not in columns:
+            connection.execute(text("ALTER TABLE scores ADD COLUMN sheet VARCHAR"))
+    for index in Score.__table__.indexes:
+        index.create(bind=engine, checkfirst=True)
 
-# Create all tables
-Base.metadata.create_all(bind=engine)
+def init_db():
+    """创建数据表并补充旧数据库缺少的列（在应用启动时调用，导入本模块时不访问数据库）"""
+    Base.metadata.create_all(bind=engine)
+    migrate_schema()
 
 # Dependency to get the database session
 def get_db():
@@ -0,0 +1,115 @@
+from typing import Any, Dict, Optional, Set
+import asyncio
+import json
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+# 多 worker 模式下通过 Redis 发布/订阅转发排行榜事件
+EVENTS_CHANNEL = "leaderboard:events"
+# 每个连接最多积压的事件数，超过后只保留一个 reload 事件，避免慢客户端占用内存
+QUEUE_SIZE = 64
+
+
+def format_event(event_type: str, data: Dict[str, Any], event_id: Optional[int] = None) -> bytes:
+    """编码为 Server-Sent Events 格式"""
+    lines = [f"event: {event_type}"]
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append("data: " + json.dumps(data, ensure_ascii=False, separators=(",", ":")))
+    return ("\n".join(lines) + "\n\n").encode("utf-8")
+
+
+class LeaderboardBroadcaster:
+    """把排行榜变化推送给所有连接的屏幕
+
+    每个事件只编码一次，同一份字节放入该科目所有连接的队列中。
+    shared=True 时事件先发布到 Redis 频道，由每个 worker 的订阅线程分发给本进程的连接。
+    """
+
+    def __init__(self, store: Any, shared: bool = False):
+        self.store = store
+        self.shared = shared
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+
+    def connection_count(self, subject: Optional[str] = None) -> int:
+        if subject is not None:
+            return len(self._subscribers.get(subject, ()))
+        return sum(len(queues) for queues in self._subscribers.values())
+
+    def start(self) -> None:
+        """在应用启动时调用；共享模式下启动 Redis 订阅线程"""
+        self._loop = asyncio.get_running_loop()
+        if self.shared and self._thread is None:
+            self._stopping.clear()
+            self._thread = threading.Thread(target=self._listen, name="leaderboard-events", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def subscribe(self, subject: str) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+        self._subscribers.setdefault(subject, set()).add(queue)
+        return queue
+
+    def unsubscribe(self, subject: str, queue: asyncio.Queue) -> None:
+        queues = self._subscribers.get(subject)
+        if queues is None:
+            return
+        queues.discard(queue)
+        if not queues:
+            self._subscribers.pop(subject, None)
+
+    def publish(self, subject: str, event_type: str, data: Dict[str, Any], event_id: Optional[int] = None) -> None:
+        """发布一个科目的事件（在事件循环线程中调用）"""
+        payload = format_event(event_type, data, event_id)
+        if not self.shared:
+            self._dispatch(subject, payload)
+            return
+        message = json.dumps({"subject": subject, "payload": payload.decode("utf-8")}, ensure_ascii=False)
+        if not self.store.publish(EVENTS_CHANNEL, message):
+            # 发布失败时至少通知本进程的连接
+            self._dispatch(subject, payload)
+
+    def _dispatch(self, subject: str, payload: bytes) -> None:
+        for queue in list(self._subscribers.get(subject, ())):
+            try:
+                queue.put_nowait(payload)
+            except asyncio.QueueFull:
+                # 客户端跟不上时丢弃积压的增量，让它重新加载整个页面
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(format_event("reload", {"reason": "backlog"}))
+
+    def _listen(self) -> None:
+        """订阅线程：从 Redis 频道接收事件并交给事件循环分发"""
+        while not self._stopping.is_set():
+            pubsub = None
+            try:
+                pubsub = self.store.pubsub()
+                pubsub.subscribe(EVENTS_CHANNEL)
+                while not self._stopping.is_set():
+                    message = pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                    if not message or message.get("type") != "message":
+                        continue
+                    event = json.loads(message["data"])
+                    self._loop.call_soon_threadsafe(
+                        self._dispatch, event["subject"], event["payload"].encode("utf-8")
+                    )
+            except Exception as e:
+                logger.error(f"Leaderboard event subscription error: {str(e)}")
+                self._stopping.wait(1.0)
+            finally:
+                if pubsub is not None:
+                    try:
+                        pubsub.close()
+                    except Exception:
+                        pass
@@ -0,0 +1,169 @@
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Optional
+import asyncio
+import logging
+import multiprocessing
+import threading
+import time
+
+from .config import PARSE_WORKERS, MERGE_WORKERS, PASSWORD_WORKERS, PASSWORD_MAX_WAITING
+
+logger = logging.getLogger(__name__)
+
+_parse_executor: Optional[Executor] = None
+_parse_executor_lock = threading.Lock()
+_merge_executor: Optional[ThreadPoolExecutor] = None
+_merge_executor_lock = threading.Lock()
+
+
+def get_parse_executor() -> Optional[Executor]:
+    """返回用于解析上传文件的进程池（首次使用时创建），PARSE_WORKERS=0 时返回 None"""
+    global _parse_executor
+    if PARSE_WORKERS <= 0:
+        return None
+    with _parse_executor_lock:
+        if _parse_executor is None:
+            # spawn 避免在已有线程的服务进程中 fork
+            _parse_executor = ProcessPoolExecutor(
+                max_workers=PARSE_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+            logger.info("Started parse process pool with %d workers", PARSE_WORKERS)
+        return _parse_executor
+
+
+async def run_in_parse_pool(func: Callable[..., Any], *args: Any) -> Any:
+    """在解析进程池中执行 CPU 密集的函数，不阻塞事件循环
+
+    func 和参数必须可以被 pickle；未启用进程池时退回到默认线程池。
+    """
+    global _parse_executor
+    loop = asyncio.get_running_loop()
+    executor = get_parse_executor()
+    try:
+        return await loop.run_in_executor(executor, func, *args)
+    except BrokenProcessPool:
+        # 子进程异常退出后进程池不可再用，丢弃它，下次使用时重新创建
+        logger.error("Parse process pool is broken, it will be recreated")
+        with _parse_executor_lock:
+            if _parse_executor is executor:
+                _parse_executor = None
+        raise
+
+
+def get_merge_executor() -> ThreadPoolExecutor:
+    """返回用于合并评委文件的线程池（首次使用时创建）"""
+    global _merge_executor
+    with _merge_executor_lock:
+        if _merge_executor is None:
+            _merge_executor = ThreadPoolExecutor(max_workers=max(1, MERGE_WORKERS), thread_name_prefix="merge")
+        return _merge_executor
+
+
+async def run_in_merge_pool(func: Callable[..., Any], *args: Any) -> Any:
+    """在合并线程池中执行排行榜合并，不阻塞事件循环
+
+    合并可能要等待其他 worker 持有的科目锁（Redis 后端最长 60 秒），
+    使用单独的线程池，等待期间不占用默认线程池（SQLite 写入、启动预热等）。
+    """
+    return await asyncio.get_running_loop().run_in_executor(get_merge_executor(), func, *args)
+
+
+class PasswordPoolBusy(Exception):
+    """等待密码哈希的请求过多"""
+
+
+class PasswordPool:
+    """bcrypt 专用的线程池：同时最多 workers 个哈希，其余请求在事件循环中排队等待
+
+    bcrypt 计算期间释放 GIL，放到线程中执行后事件循环可以继续处理排行榜请求；
+    排队的请求超过 max_waiting 时直接拒绝，避免登录高峰堆积。
+    """
+
+    def __init__(self, workers: int, max_waiting: int):
+        self.workers = max(1, workers)
+        self.max_waiting = max_waiting
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.waiting = 0
+        self.running = 0
+        self.completed = 0
+        self.rejected = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self.run_seconds_total = 0.0
+
+    def _ensure_started(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._loop is not loop:
+            # Semaphore 绑定在创建它的事件循环上
+            self._semaphore = asyncio.Semaphore(self.workers)
+            self._loop = loop
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="password")
+        return self._semaphore
+
+    async def run(self, func: Callable[..., Any], *args: Any) -> Any:
+        semaphore = self._ensure_started()
+        if semaphore.locked() and self.waiting >= self.max_waiting:
+            self.rejected += 1
+            raise PasswordPoolBusy(f"{self.waiting} password operations already waiting")
+        queued_at = time.perf_counter()
+        self.waiting += 1
+        try:
+            await semaphore.acquire()
+        finally:
+            self.waiting -= 1
+        waited = time.perf_counter() - queued_at
+        self.wait_seconds_total += waited
+        self.wait_seconds_max = max(self.wait_seconds_max, waited)
+        self.running += 1
+        started_at = time.perf_counter()
+        try:
+            return await self._loop.run_in_executor(self._executor, func, *args)
+        finally:
+            self.running -= 1
+            self.completed += 1
+            self.run_seconds_total += time.perf_counter() - started_at
+            semaphore.release()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "waiting": self.waiting,
+            "running": self.running,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "wait_seconds_total": round(self.wait_seconds_total, 4),
+            "wait_seconds_max": round(self.wait_seconds_max, 4),
+            "run_seconds_total": round(self.run_seconds_total, 4),
+        }
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+password_pool = PasswordPool(PASSWORD_WORKERS, PASSWORD_MAX_WAITING)
+
+
+async def run_password_task(func: Callable[..., Any], *args: Any) -> Any:
+    """在密码线程池中执行 bcrypt 计算；排队过多时抛出 PasswordPoolBusy"""
+    return await password_pool.run(func, *args)
+
+
+def shutdown_executors():
+    """应用关闭时停止进程池和线程池"""
+    global _parse_executor, _merge_executor
+    with _parse_executor_lock:
+        if _parse_executor is not None:
+            _parse_executor.shutdown(wait=False, cancel_futures=True)
+            _parse_executor = None
+    with _merge_executor_lock:
+        if _merge_executor is not None:
+            _merge_executor.shutdown(wait=False, cancel_futures=True)
+            _merge_executor = None
+    password_pool.shutdown()
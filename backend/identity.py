@@ -0,0 +1,170 @@
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+import logging
+import threading
+import time
+
+from sqlalchemy import event, inspect
+
+from .auth import decode_token
+from .database import User
+
+logger = logging.getLogger(__name__)
+
+
+class AuthenticationError(Exception):
+    """令牌无效或用户不存在"""
+
+
+@dataclass(frozen=True)
+class Identity:
+    """已验证的评委身份"""
+    username: str
+    user_id: int
+
+
+class UserDirectory:
+    """用户名 → 用户 ID 的内存映射，用户表变化时按用户名失效"""
+
+    def __init__(self):
+        self._ids: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_id(self, db: Any, username: str) -> Optional[int]:
+        """返回用户 ID；不在映射中时查询数据库，用户不存在时返回 None（不缓存）"""
+        with self._lock:
+            user_id = self._ids.get(username)
+            if user_id is not None:
+                self.hits += 1
+                return user_id
+            self.misses += 1
+        user_id = db.query(User.id).filter(User.username == username).scalar()
+        if user_id is not None:
+            self.remember(username, user_id)
+        return user_id
+
+    def remember(self, username: str, user_id: int) -> None:
+        with self._lock:
+            self._ids[username] = user_id
+
+    def forget(self, username: str) -> None:
+        with self._lock:
+            self._ids.pop(username, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._ids.clear()
+
+    def stats(self) -> dict:
+        return {"users": len(self._ids), "hits": self.hits, "misses": self.misses}
+
+
+class TokenCache:
+    """已验证令牌 → 身份的 LRU 缓存
+
+    条目在 ttl 秒后或令牌本身过期时失效（取较早者），用户被修改或删除时按用户名失效。
+    命中时既不需要重新校验签名，也不需要查询数据库。
+    """
+
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[str, Tuple[Identity, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, token: str) -> Optional[Identity]:
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is not None and entry[1] > time.time():
+                self._entries.move_to_end(token)
+                self.hits += 1
+                return entry[0]
+            if entry is not None:
+                del self._entries[token]
+            self.misses += 1
+            return None
+
+    def put(self, token: str, identity: Identity, token_expires: Optional[float] = None) -> None:
+        expires = time.time() + self.ttl
+        if token_expires is not None:
+            expires = min(expires, token_expires)
+        with self._lock:
+            self._entries[token] = (identity, expires)
+            self._entries.move_to_end(token)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate_user(self, username: str) -> None:
+        with self._lock:
+            stale = [token for token, (identity, _) in self._entries.items() if identity.username == username]
+            for token in stale:
+                del self._entries[token]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+class Authenticator:
+    """验证 cookie 中的令牌，常见情况下不访问 SQLite"""
+
+    def __init__(self, max_entries: int, ttl: float):
+        self.tokens = TokenCache(max_entries, ttl)
+        self.users = UserDirectory()
+
+    def authenticate(self, db: Any, token: str) -> Identity:
+        identity = self.tokens.get(token)
+        if identity is not None:
+            return identity
+        try:
+            payload = decode_token(token)
+        except Exception as e:
+            raise AuthenticationError(str(e))
+        username = payload.get("sub")
+        if not username:
+            raise AuthenticationError("missing username")
+        user_id = self.users.get_id(db, username)
+        if user_id is None:
+            raise AuthenticationError("user not found")
+        identity = Identity(username=username, user_id=user_id)
+        self.tokens.put(token, identity, payload.get("exp"))
+        return identity
+
+    def user_changed(self, username: str) -> None:
+        """用户被修改或删除后调用，丢弃该用户的缓存"""
+        self.users.forget(username)
+        self.tokens.invalidate_user(username)
+
+    def stats(self) -> dict:
+        return {"tokens": self.tokens.stats(), "users": self.users.stats()}
+
+    def install_listeners(self) -> None:
+        """监听 User 的 ORM 更新和删除事件，任何代码修改用户后缓存都会失效"""
+        def on_change(mapper, connection, target):
+            self.user_changed(target.username)
+            # 用户名本身被修改时旧用户名也要失效
+            for old_username in inspect(target).attrs.username.history.deleted or ():
+                self.user_changed(old_username)
+
+        event.listen(User, "after_update", on_change)
+        event.listen(User, "after_delete", on_change)
+
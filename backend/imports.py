@@ -0,0 +1,103 @@
+from dataclasses import dataclass, field
+from typing import Dict, List, Tuple, Callable, Optional, Any
+import asyncio
+import logging
+
+from .executors import run_in_parse_pool, run_in_merge_pool
+from .metrics import UPLOAD_FILES, UPLOAD_ROWS
+from .merge import merge_sheets, make_sheet_id, MergeResult
+from .records import save_sheets
+
+logger = logging.getLogger(__name__)
+
+ProgressCallback = Callable[..., None]
+
+
+@dataclass
+class ImportResult:
+    """一次成绩导入的结果"""
+    file_count: int
+    success_count: int = 0
+    students_written: int = 0
+    avg_judges: float = 0.0
+    students_with_3plus: int = 0
+    rows_saved: int = 0
+    error_messages: List[str] = field(default_factory=list)
+    merged: Optional[MergeResult] = None
+
+    def summary(self) -> str:
+        """与同步上传时返回的提示保持一致"""
+        if self.success_count > 0:
+            return (
+                f"成功导入 {self.success_count} 条记录。\n"
+                f"处理了 {self.file_count} 个文件。\n"
+                f"平均每个学生有 {self.avg_judges:.1f} 位评委评分。\n"
+                f"有 {self.students_with_3plus} 名学生获得了3位及以上评委的评分。\n"
+                f"以下记录导入失败：\n" + "\n".join(self.error_messages)
+            )
+        return "\n".join(self.error_messages)
+
+
+async def run_score_import(store: Any, subject: str, spooled: List[Tuple[str, str]], file_count: int,
+                           error_messages: Optional[List[str]] = None,
+                           progress: Optional[ProgressCallback] = None,
+                           judge: Optional[str] = None) -> ImportResult:
+    """解析已写入磁盘的评分文件并增量合并到排行榜
+
+    spooled 为 (文件名, 临时文件路径) 列表，调用方负责删除临时文件。
+    每个 (评委, 文件名) 对应一个评委文件，同一评委重新上传同名文件会替换自己之前的分数，
+    不同评委上传同名文件（例如都使用下载的模板）互不影响。
+    progress(**fields) 在每个文件解析完成、开始写入和写入完成时被调用。
+    """
+    # 解析模块依赖 pandas 和 openpyxl，第一次导入文件时才加载
+    from .ingest import parse_sheet
+
+    result = ImportResult(file_count=file_count, error_messages=list(error_messages or []))
+    report = progress or (lambda **fields: None)
+    sheets: Dict[str, Dict[str, List[float]]] = {}
+    files_parsed = 0
+    rows_rejected = 0
+
+    async def parse(filename: str, path: str):
+        nonlocal files_parsed, rows_rejected
+        try:
+            entries, row_count, file_errors = await run_in_parse_pool(parse_sheet, filename, path)
+            # 没有有效记录的文件不替换之前上传的同名文件
+            if entries:
+                sheet = sheets.setdefault(make_sheet_id(judge, filename), {})
+                for student, scores in entries.items():
+                    sheet.setdefault(student, []).extend(scores)
+            result.error_messages.extend(file_errors)
+            result.success_count += row_count
+            rows_rejected += len(file_errors)
+            UPLOAD_FILES.inc(("parsed",))
+            UPLOAD_ROWS.inc(("accepted",), row_count)
+            UPLOAD_ROWS.inc(("rejected",), len(file_errors))
+        except Exception as e:
+            UPLOAD_FILES.inc(("failed",))
+            result.error_messages.append(f"处理文件 {filename} 时出错: {str(e)}")
+        files_parsed += 1
+        report(files_parsed=files_parsed, rows_accepted=result.success_count, rows_rejected=rows_rejected)
+
+    # 在进程池中并行解析各个文件，事件循环继续处理其他请求
+    await asyncio.gather(*(parse(filename, path) for filename, path in spooled))
+
+    # 只重新计算这些文件涉及的学生，所有写入在同一个管道中原子提交；在线程中执行，不阻塞事件循环
+    report(status="writing")
+    if sheets:
+        merged = result.merged = await run_in_merge_pool(merge_sheets, store, subject, sheets, (), judge)
+        result.students_written = merged.students_written
+        result.avg_judges = merged.avg_judges
+        result.students_with_3plus = merged.students_with_3plus
+        logger.info("Subject %s stats: total_students=%d, avg_judges=%.2f, students_with_3plus=%d",
+                    subject, merged.total_students, merged.avg_judges, merged.students_with_3plus)
+        # 同时写入 SQLite（一个事务、批量插入），在线程中执行，不阻塞事件循环
+        try:
+            result.rows_saved = await asyncio.get_running_loop().run_in_executor(
+                None, save_sheets, subject, sheets, judge
+            )
+        except Exception as e:
+            logger.error(f"Error saving scores of subject {subject} to database: {str(e)}")
+            result.error_messages.append(f"保存到数据库时出错: {str(e)}\nError saving scores to database: {str(e)}")
+    report(students_written=result.students_written)
+    return result
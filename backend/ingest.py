@@ -0,0 +1,188 @@
+from typing import List, Dict, Tuple, Union, IO, Iterator
+from contextlib import contextmanager
+from itertools import islice
+import pandas as pd
+import numpy as np
+import logging
+import io
+import openpyxl
+
+logger = logging.getLogger(__name__)
+
+# 必要的列及其可接受的标题
+REQUIRED_COLUMNS = {
+    '班级/Class': ['班级/Class', '班级', 'Class'],
+    '姓名/Name': ['姓名/Name', '姓名', 'Name'],
+    '分数/Score': ['分数/Score', '分数', 'Score']
+}
+
+# 每次解析的行数
+CHUNK_ROWS = 10000
+
+# 全角句号、全角逗号和半角逗号都按小数点处理
+DECIMAL_FIXUPS = str.maketrans({'。': '.', '，': '.', ',': '.'})
+
+
+def empty_scores_frame() -> pd.DataFrame:
+    return pd.DataFrame({
+        "class_name": pd.Series(dtype=object),
+        "student_name": pd.Series(dtype=object),
+        "score": pd.Series(dtype=float),
+    })
+
+
+@contextmanager
+def _raw_chunks(filename: str, source: Union[str, bytes, IO[bytes]]) -> Iterator[Tuple[List[str], Iterator[pd.DataFrame]]]:
+    """流式读取文件：返回标题行和按 CHUNK_ROWS 分块的原始数据，数据列按位置编号"""
+    if isinstance(source, bytes):
+        source = io.BytesIO(source)
+
+    if filename.lower().endswith('.csv'):
+        # 全部按文本读取，分数在后面统一解析
+        headers = [str(header).strip() for header in pd.read_csv(source, encoding='utf-8-sig', nrows=0).columns]
+        if hasattr(source, "seek"):
+            source.seek(0)
+        reader = pd.read_csv(
+            source, encoding='utf-8-sig', dtype=str, keep_default_na=False, chunksize=CHUNK_ROWS
+        )
+
+        def csv_chunks():
+            for chunk in reader:
+                chunk.columns = range(len(headers))
+                yield chunk.reset_index(drop=True)
+
+        try:
+            yield headers, csv_chunks()
+        finally:
+            reader.close()
+        return
+
+    # 只读模式按行解析 XML，不在内存中构建整个单元格树
+    workbook = openpyxl.load_workbook(source, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header_row = next(rows, ())
+        headers = [str(value or '').strip() for value in header_row]
+        width = len(headers)
+
+        def excel_chunks():
+            while True:
+                batch = [row[:width] for row in islice(rows, CHUNK_ROWS)]
+                if not batch:
+                    return
+                # 保留单元格原来的值：数字列中有空单元格时，推断的 float64 会把班级 1 变成 "1.0"
+                yield pd.DataFrame(batch, columns=range(width), dtype=object)
+
+        yield headers, excel_chunks()
+    finally:
+        workbook.close()
+
+
+def _text_column(values: pd.Series) -> pd.Series:
+    """班级、姓名列：空值视为空字符串，去掉首尾空白（只对去重后的取值做字符串处理）"""
+    codes, uniques = pd.factorize(values.fillna(''), sort=False)
+    cleaned = np.array([str(value).strip() for value in uniques], dtype=object)
+    return pd.Series(cleaned[codes], index=values.index, dtype=object)
+
+
+def parse_score_file(filename: str, source: Union[str, bytes, IO[bytes]]) -> Tuple[pd.DataFrame, List[str]]:
+    """解析单个评分文件（路径、字节或文件对象），返回有效的分数记录和逐行的错误信息
+
+    文件按 CHUNK_ROWS 行分块读取和校验，峰值内存与文件大小无关，
+    只保留每块校验通过的三列数据。
+    """
+    with _raw_chunks(filename, source) as (headers, chunks):
+        # 找到每个必要列的索引
+        column_indices = {}
+        missing_columns = []
+        for key, valid_names in REQUIRED_COLUMNS.items():
+            for i, header in enumerate(headers):
+                if header in valid_names:
+                    column_indices[key] = i
+                    break
+            else:
+                missing_columns.append(key)
+
+        if missing_columns:
+            error_msg = f"文件 {filename} 缺少以下必要的列：\n" + "\n".join(missing_columns)
+            logger.error(error_msg)
+            return empty_scores_frame(), [error_msg]
+
+        frames = []
+        error_messages = []
+        first_row = 2  # 标题为第 1 行
+        for raw in chunks:
+            frame, chunk_errors = _validate_chunk(filename, raw, column_indices, first_row)
+            frames.append(frame)
+            error_messages.extend(chunk_errors)
+            first_row += len(raw)
+
+    if not frames:
+        return empty_scores_frame(), error_messages
+    return pd.concat(frames, ignore_index=True), error_messages
+
+
+def _validate_chunk(filename: str, raw: pd.DataFrame, column_indices: Dict[str, int],
+                    first_row: int) -> Tuple[pd.DataFrame, List[str]]:
+    """校验一块原始数据，first_row 为这一块第一行在表格中的行号"""
+    class_names = _text_column(raw[column_indices['班级/Class']])
+    student_names = _text_column(raw[column_indices['姓名/Name']])
+    raw_scores = raw[column_indices['分数/Score']]
+
+    # 向量化解析分数，只有解析失败的少数单元格才修正小数点后重试
+    scores = pd.to_numeric(raw_scores, errors='coerce').astype(float)
+    empty_score = np.zeros(len(raw_scores), dtype=bool)
+    unparsed = np.flatnonzero(scores.isna().to_numpy())
+    if len(unparsed):
+        texts = raw_scores.iloc[unparsed].map(lambda value: value.strip() if isinstance(value, str) else value)
+        empty_score[unparsed] = (texts.isna() | (texts == '')).to_numpy()
+        fixed = texts.map(lambda value: value.translate(DECIMAL_FIXUPS) if isinstance(value, str) else value)
+        scores.iloc[unparsed] = pd.to_numeric(fixed, errors='coerce').to_numpy()
+
+    missing_name = ((class_names == '') | (student_names == '')).to_numpy()
+    bad_format = ~empty_score & scores.isna().to_numpy()
+    out_of_range = ~empty_score & ~bad_format & ~scores.between(0, 10).to_numpy()
+    invalid = missing_name | empty_score | bad_format | out_of_range
+
+    # 只对出错的行逐行生成错误信息，行号与表格中一致
+    error_messages = []
+    for pos in np.flatnonzero(invalid):
+        row_number = first_row + pos
+        if missing_name[pos]:
+            error_messages.append(f"文件 {filename} 第 {row_number} 行的班级或姓名为空")
+            continue
+        score_value = raw_scores.iat[pos]
+        if empty_score[pos]:
+            reason = "分数不能为空"
+        elif bad_format[pos]:
+            reason = f"could not convert string to float: '{str(score_value).strip()}'"
+        else:
+            reason = f"分数 {scores.iat[pos]} 超出范围(0-10)"
+        error_messages.append(
+            f"文件 {filename} 第 {row_number} 行的分数格式不正确: '{score_value}'\n"
+            f"错误信息: {reason}"
+        )
+
+    valid = ~invalid
+    frame = pd.DataFrame({
+        "class_name": class_names[valid].to_numpy(),
+        "student_name": student_names[valid].to_numpy(),
+        "score": scores[valid].to_numpy(),
+    })
+    return frame, error_messages
+
+
+def sheet_scores(frame: pd.DataFrame) -> Dict[str, List[float]]:
+    """把一个评委文件的记录按学生归组：{class}:{name} → 分数列表（按行的先后顺序）"""
+    entries: Dict[str, List[float]] = {}
+    for class_name, student_name, score in zip(
+        frame["class_name"].tolist(), frame["student_name"].tolist(), frame["score"].tolist()
+    ):
+        entries.setdefault(f"{class_name}:{student_name}", []).append(score)
+    return entries
+
+
+def parse_sheet(filename: str, source: Union[str, bytes, IO[bytes]]) -> Tuple[Dict[str, List[float]], int, List[str]]:
+    """解析一个评委文件并按学生归组，返回 (学生 → 分数列表, 有效记录数, 错误信息)"""
+    frame, error_messages = parse_score_file(filename, source)
+    return sheet_scores(frame), len(frame), error_messages
@@ -0,0 +1,92 @@
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+import json
+import logging
+import time
+import uuid
+
+from .config import IMPORT_JOB_TTL
+
+logger = logging.getLogger(__name__)
+
+# 导入任务的状态保存在排行榜存储中，多个 worker 都可以查询
+JOB_KEY = "import_job:{job_id}"
+# 所有任务按最后更新时间排序的有序集合，用于清理长时间没有更新的任务（本地存储不支持过期时间）
+JOBS_KEY = "import_jobs"
+# 每次清理最多删除的任务数
+PURGE_BATCH = 100
+INT_FIELDS = ("file_count", "files_parsed", "rows_accepted", "rows_rejected", "students_written")
+
+
+def create_import_job(store: Any, subject: str, judge: str, file_count: int) -> str:
+    """登记一个新的导入任务，返回任务 ID"""
+    purge_import_jobs(store)
+    job_id = uuid.uuid4().hex
+    now = datetime.now().isoformat()
+    pipe = store.pipeline(transaction=True)
+    pipe.hset(JOB_KEY.format(job_id=job_id), mapping={
+        "job_id": job_id,
+        "subject": subject,
+        "judge": judge,
+        "status": "queued",
+        "file_count": str(file_count),
+        "files_parsed": "0",
+        "rows_accepted": "0",
+        "rows_rejected": "0",
+        "students_written": "0",
+        "errors": "[]",
+        "created_at": now,
+        "updated_at": now,
+    })
+    pipe.zadd(JOBS_KEY, {job_id: time.time()})
+    pipe.execute()
+    return job_id
+
+
+def update_import_job(store: Any, job_id: str, errors: Optional[List[str]] = None, **fields: Any) -> None:
+    """更新任务进度，errors 以 JSON 列表保存"""
+    mapping = {key: str(value) for key, value in fields.items()}
+    if errors is not None:
+        mapping["errors"] = json.dumps(errors, ensure_ascii=False)
+    mapping["updated_at"] = datetime.now().isoformat()
+    pipe = store.pipeline(transaction=True)
+    pipe.hset(JOB_KEY.format(job_id=job_id), mapping=mapping)
+    pipe.zadd(JOBS_KEY, {job_id: time.time()})
+    pipe.execute()
+
+
+def get_import_job(store: Any, job_id: str) -> Optional[Dict[str, Any]]:
+    """读取任务状态，不存在时返回 None"""
+    job = store.hgetall(JOB_KEY.format(job_id=job_id))
+    if not job:
+        return None
+    result = dict(job)
+    for key in INT_FIELDS:
+        result[key] = int(result.get(key, 0))
+    result["errors"] = json.loads(result.get("errors") or "[]")
+    return result
+
+
+def purge_import_jobs(store: Any, max_age: float = IMPORT_JOB_TTL) -> int:
+    """删除超过 max_age 秒没有更新的任务（已完成的任务和中断的任务），返回删除的个数"""
+    cutoff = time.time() - max_age
+    purged = 0
+    while True:
+        expired = [
+            job_id for job_id, updated in store.zrange(JOBS_KEY, 0, PURGE_BATCH - 1, withscores=True)
+            if updated < cutoff
+        ]
+        if not expired:
+            break
+        pipe = store.pipeline(transaction=True)
+        for job_id in expired:
+            pipe.delete(JOB_KEY.format(job_id=job_id))
+        pipe.zrem(JOBS_KEY, *expired)
+        pipe.execute()
+        purged += len(expired)
+        if len(expired) < PURGE_BATCH:
+            break
+    if purged:
+        logger.info("Purged %d import jobs older than %ds", purged, max_age)
+    return purged
+
@@ -0,0 +1,66 @@
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Optional
+import logging
+import queue
+
+from .config import LOG_LEVEL, LOG_LEVELS
+
+LOG_FORMAT = "%(asctime)s %(levelname)s %(name)s: %(message)s"
+
+_listener: Optional[QueueListener] = None
+
+
+class DeferredQueueHandler(QueueHandler):
+    """把日志记录原样放入队列，格式化和写出都在监听线程中进行
+
+    标准的 QueueHandler 会在调用线程中格式化消息（为了跨进程传递），
+    这里的队列只在进程内使用，请求线程只需把记录放入队列。
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+def parse_levels(spec: str) -> Dict[str, int]:
+    """解析 "backend.storage=WARNING,uvicorn.access=ERROR" 形式的按模块日志级别"""
+    levels = {}
+    for item in spec.split(","):
+        name, _, level = item.partition("=")
+        if name.strip() and level.strip():
+            levels[name.strip()] = logging.getLevelName(level.strip().upper())
+    return levels
+
+
+def configure_logging(level: str = LOG_LEVEL, module_levels: str = LOG_LEVELS) -> None:
+    """配置根日志：请求线程只把记录放入队列，由后台线程写到标准错误；可重复调用"""
+    global _listener
+    root = logging.getLogger()
+    root.setLevel(logging.getLevelName(level.upper()))
+    for name, module_level in parse_levels(module_levels).items():
+        logging.getLogger(name).setLevel(module_level)
+    if _listener is not None:
+        return
+
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(DeferredQueueHandler(log_queue))
+    _listener = QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+
+
+def stop_logging() -> None:
+    """写出队列中剩余的日志并停止后台线程（应用关闭时调用），之后的日志直接写出"""
+    global _listener
+    if _listener is None:
+        return
+    _listener.stop()
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        if isinstance(handler, DeferredQueueHandler):
+            root.removeHandler(handler)
+    for handler in _listener.handlers:
+        root.addHandler(handler)
+    _listener = None
@@ -1,121 +1,54 @@
 from fastapi import FastAPI, Depends, HTTPException, Request, Form, UploadFile, File
-from fastapi.responses import HTMLResponse, RedirectResponse, FileResponse
+from fastapi.responses import HTMLResponse, RedirectResponse, FileResponse, JSONResponse, Response, StreamingResponse, ORJSONResponse
 from fastapi.templating import Jinja2Templates
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy.orm import Session
 from sqlalchemy import func
-from backend.database import SessionLocal, User, Score, Student, get_db
-from backend.auth import create_access_token, decode_token, get_password_hash, verify_password
-from backend.config import TEMPLATES_DIR, STATIC_DIR, ALLOWED_ORIGINS, DEBUG
-from datetime import datetime
-from typing import List, Dict, Any, Optional, Union
-import pandas as pd
-import numpy as np
+from backend.database import SessionLocal, User, Score, Student, get_db, engine, init_db
+from backend.auth import create_access_token, get_password_hash_async, verify_password_async
+from backend.config import TEMPLATES_DIR, STATIC_DIR, ALLOWED_ORIGINS, DEBUG, RENDER_CACHE_MAX_BYTES
+from backend.config import TOKEN_CACHE_SIZE, TOKEN_CACHE_TTL, WARMUP_CHUNK_SIZE, ADMIN_USERS, PROFILE_MAX_SECONDS
+from backend.storage import RemoteRedisClient, create_redis_client
+from backend.ranking import decode_sort_key
+from backend.uploads import spool_upload
+from backend.imports import run_score_import
+from backend.merge import retract_sheet, list_sheets
+from backend.subjects import list_subjects, rebuild_subject_registry
+from backend.cache import RenderCache, subject_version, subject_updated_at, global_version, make_etag
+from backend.events import LeaderboardBroadcaster, format_event
+from backend.jobs import create_import_job, update_import_job, get_import_job, purge_import_jobs
+from backend.executors import shutdown_executors, password_pool, PasswordPoolBusy, run_in_merge_pool
+from backend.identity import Authenticator, AuthenticationError
+from backend.records import save_sheets
+from backend.warmup import WarmupState, warm_store
+from backend.logging_config import configure_logging, stop_logging
+from backend.profiler import profiler, ProfilerBusy, format_collapsed
+from backend.metrics import (REGISTRY, CONTENT_TYPE, CallbackMetric, EventLoopMonitor, MetricsMiddleware,
+                             instrument_engine, instrument_store)
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import List, Dict, Any, Optional, Union, Tuple
+import asyncio
+import base64
+import binascii
+import json
 import logging
 import os
 import io
-import openpyxl
 import sys
+import threading
 
-# 配置日志
-logging.basicConfig(level=logging.INFO)
+# 配置日志：记录放入队列，由后台线程写出，请求线程不等待输出
+configure_logging()
 logger = logging.getLogger(__name__)
 
-class RedisClient:
-    def __init__(self):
-        self.storage = {}
-        logger.info("Using local storage mode")
-
-    def ensure_connection(self):
-        return True
-
-    def set(self, key: str, value: str) -> bool:
-        try:
-            self.storage[key] = value
-            return True
-        except Exception as e:
-            logger.error(f"Error in set operation: {str(e)}")
-            return False
-
-    def get(self, key: str) -> Optional[str]:
-        try:
-            return self.storage.get(key)
-        except Exception as e:
-            logger.error(f"Error in get operation: {str(e)}")
-            return None
-
-    def delete(self, key: str) -> bool:
-        try:
-            self.storage.pop(key, None)
-            return True
-        except Exception as e:
-            logger.error(f"Error in delete operation: {str(e)}")
-            return False
-
-    def zadd(self, key: str, mapping: Dict[str, float]) -> bool:
-        try:
-            if key not in self.storage:
-                self.storage[key] = {}
-            self.storage[key].update(mapping)
-            return True
-        except Exception as e:
-            logger.error(f"Error in zadd operation: {str(e)}")
-            return False
-
-    def zrange(self, key: str, start: int, stop: int, withscores: bool = False) -> Union[List[str], List[tuple]]:
-        try:
-            data = self.storage.get(key, {})
-            sorted_items = sorted(data.items(), key=lambda x: float(x[1]))
-            if stop < 0:
-                stop = len(sorted_items) + stop + 1
-            result = sorted_items[start:stop]
-            if withscores:
-                return [(item[0], float(item[1])) for item in result]
-            return [item[0] for item in result]
-        except Exception as e:
-            logger.error(f"Error in zrange operation: {str(e)}")
-            return []
-
-    def zrevrange(self, key: str, start: int, stop: int, withscores: bool = False) -> Union[List[str], List[tuple]]:
-        try:
-            result = self.zrange(key, start, stop, withscores=withscores)
-            if withscores:
-                return [(item[0], float(item[1])) for item in reversed(result)]
-            return list(reversed(result))
-        except Exception as e:
-            logger.error(f"Error in zrevrange operation: {str(e)}")
-            return []
-
-    def hset(self, key: str, mapping: Dict[str, Any]) -> bool:
-        try:
-            if key not in self.storage:
-                self.storage[key] = {}
-            self.storage[key].update(mapping)
-            return True
-        except Exception as e:
-            logger.error(f"Error in hset operation: {str(e)}")
-            return False
-
-    def hgetall(self, key: str) -> Dict[str, str]:
-        try:
-            return self.storage.get(key, {})
-        except Exception as e:
-            logger.error(f"Error in hgetall operation: {str(e)}")
-            return {}
-
-    def scan_iter(self, pattern: str) -> List[str]:
-        try:
-            matching_keys = []
-            for key in self.storage.keys():
-                if pattern.replace("*", "") in key:
-                    matching_keys.append(key)
-            return matching_keys
-        except Exception as e:
-            logger.error(f"Error in scan_iter operation: {str(e)}")
-            return []
-
-redis_client = RedisClient()
+# 存储操作和 SQLite 语句的耗时记录到 /metrics
+redis_client = instrument_store(create_redis_client())
+instrument_engine(engine)
+loop_monitor = EventLoopMonitor()
+warmup_state = WarmupState()
+_warmup_task: Optional[asyncio.Task] = None
 
 # 创建 FastAPI 应用
 app = FastAPI(title="实时排行榜", debug=DEBUG)
@@ -124,16 +57,50 @@ app = FastAPI(title="实时排行榜", debug=DEBUG)
 @app.on_event("startup")
 async def startup_event():
     """在应用启动时测试Redis连接"""
+    configure_logging()
+    init_db()
+    # 本地存储启用了持久化时先从磁盘恢复数据
+    if getattr(redis_client, "persistence", None) is not None:
+        try:
+            redis_client.persistence.open()
+        except Exception as e:
+            # 数据目录不可用时不持久化，排行榜由启动预热从 SQLite 重建
+            logger.error(f"Error opening local store persistence, continuing without it: {e}")
+            redis_client.persistence = None
     logger.info("Testing Redis connection on startup...")
     try:
         if redis_client.ensure_connection():
-            logger.info("Redis connection test successful")
+            logger.info("Redis connection test successful (%s)", type(redis_client).__name__)
         else:
             logger.warning("Redis connection test failed")
-            logger.info("Using local storage instead of Redis")
+        rebuild_subject_registry(redis_client)
+        purge_import_jobs(redis_client)
     except Exception as e:
         logger.error(f"Error during startup: {e}")
-        logger.info("Using local storage instead of Redis")
+    broadcaster.start()
+    loop_monitor.start()
+    # 在后台线程中从 SQLite 预热排行榜，期间 /health 返回 503
+    global _warmup_task
+    _warmup_task = asyncio.create_task(_warm_up())
+
+async def _warm_up():
+    await asyncio.get_running_loop().run_in_executor(None, warm_store, redis_client, warmup_state, WARMUP_CHUNK_SIZE)
+    # 预热期间已经连接的屏幕重新加载
+    for subject in warmup_state.subjects_loaded:
+        broadcaster.publish(subject, "reload", {"reason": "warmup"})
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """应用关闭时停止解析进程池和事件订阅线程，并写入本地存储的快照"""
+    if _warmup_task is not None and not _warmup_task.done():
+        await _warmup_task
+    shutdown_executors()
+    broadcaster.stop()
+    await loop_monitor.stop()
+    if getattr(redis_client, "persistence", None) is not None:
+        redis_client.persistence.close()
+    # 最后写出队列中剩余的日志
+    stop_logging()
 
 # 配置 CORS
 app.add_middleware(
@@ -143,6 +110,8 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# 最外层的中间件，记录每个请求的耗时
+app.add_middleware(MetricsMiddleware)
 
 # 设置模板目录
 templates_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "templates")
@@ -157,6 +126,8 @@ templates.env.globals.update(enumerate=enumerate)
 
 # 创建Excel模板
 def create_excel_template():
+    import pandas as pd
+
     df = pd.DataFrame(columns=['班级/Class', '姓名/Name', '分数/Score'])
     output = io.BytesIO()
     with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
@@ -170,6 +141,8 @@ def create_excel_template():
 @app.get("/download_template")
 async def download_template():
     """下载评分模板"""
+    import pandas as pd
+
     try:
         # 创建示例数据
         data = {
@@ -180,7 +153,7 @@ async def download_template():
         
         # 创建DataFrame
         df = pd.DataFrame(data)
-        logger.info(f"Created template DataFrame with columns: {df.columns.tolist()}")
+        logger.debug("Created template DataFrame with columns: %s", df.columns.tolist())
         
         # 根据请求的格式创建相应的文件
         format = request.query_params.get('format', 'excel')
@@ -241,7 +214,6 @@ async def download_template():
                 # 应用标题格式
                 for col, column_name in enumerate(df.columns):
                     worksheet.write(0, col, column_name, header_format)
-                    logger.info(f"Writing column header: {column_name}")
                 
                 # 应用数据格式
                 for row in range(len(df)):
@@ -282,20 +254,44 @@ async def download_template():
             detail=f"创建模板文件时出错: {str(e)}\nError creating template file: {str(e)}"
         )
 
+# 已验证令牌 → 评委身份的缓存；用户被修改或删除时通过 ORM 事件失效
+authenticator = Authenticator(TOKEN_CACHE_SIZE, TOKEN_CACHE_TTL)
+authenticator.install_listeners()
+
+def _require_judge(request: Request, db: Session) -> str:
+    """从 cookie 中的令牌验证评委身份，返回用户名"""
+    access_token = request.cookies.get("access_token")
+    if not access_token:
+        raise HTTPException(
+            status_code=401, 
+            detail="请先登录\nPlease login first"
+        )
+    
+    try:
+        # 令牌和用户都已验证过时直接命中缓存，不查询数据库
+        identity = authenticator.authenticate(db, access_token)
+    except AuthenticationError as e:
+        logger.warning("Token validation error: %s", e)
+        raise HTTPException(status_code=401, detail=f"Invalid token: {str(e)}")
+    return identity.username
+
 @app.post("/upload_scores")
 async def upload_scores(
     request: Request,
     subject: str = Form(...),
     files: List[UploadFile] = File(...),
+    async_import: bool = Form(False),
     db: Session = Depends(get_db)
 ):
-    """处理多个Excel或CSV文件上传并计算平均分"""
+    """处理多个Excel或CSV文件上传并计算平均分
+
+    async_import 为真时只登记导入任务并立即返回任务 ID，
+    进度通过 /api/import_jobs/{job_id} 查询。
+    """
     try:
         # 测试Redis连接
         try:
-            logger.info("Testing Redis connection before processing upload...")
             redis_client.ensure_connection()
-            logger.info("Redis connection confirmed")
         except Exception as e:
             logger.error(f"Redis connection error before processing: {str(e)}")
             raise HTTPException(
@@ -304,265 +300,51 @@ async def upload_scores(
             )
 
         # 验证评委身份
-        access_token = request.cookies.get("access_token")
-        if not access_token:
-            raise HTTPException(
-                status_code=401, 
-                detail="请先登录\nPlease login first"
-            )
-        
-        try:
-            payload = decode_token(access_token)
-            judge_username = payload.get("sub")
-            if not judge_username:
-                raise HTTPException(status_code=401, detail="Invalid token: missing username")
-            
-            # 验证用户是否存在
-            user = db.query(User).filter(User.username == judge_username).first()
-            if not user:
-                raise HTTPException(status_code=401, detail="Invalid token: user not found")
-        except Exception as e:
-            logger.error(f"Token validation error: {str(e)}")
-            raise HTTPException(status_code=401, detail=f"Invalid token: {str(e)}")
+        judge_username = _require_judge(request, db)
 
         # 处理所有上传的文件
-        all_scores = {}  # 用于存储所有学生的所有分数
         error_messages = []
-        success_count = 0
         file_count = len(files)
 
-        logger.info(f"Processing {file_count} files")
-
-        for file_index, file in enumerate(files, 1):
+        # 先把所有文件写入磁盘，不在内存中保留整个文件（请求结束后上传的文件即被关闭）
+        spooled = []  # (文件名, 临时文件路径)
+        for file in files:
             try:
-                contents = await file.read()
-                logger.info(f"Processing file {file_index}/{file_count}: {file.filename}, size: {len(contents)} bytes")
-                
-                # 根据文件扩展名决定处理方式
-                if file.filename.lower().endswith('.csv'):
-                    # 处理CSV文件
-                    df = pd.read_csv(io.BytesIO(contents), encoding='utf-8-sig')
-                    headers = df.columns.tolist()
-                else:
-                    # 处理Excel文件
-                    workbook = openpyxl.load_workbook(io.BytesIO(contents), data_only=True)
-                    worksheet = workbook.active
-                    
-                    # 获取标题行
-                    headers = []
-                    for cell in worksheet[1]:
-                        value = cell.value
-                        headers.append(str(value or '').strip())
-                
-                # 检查必要的列
-                required_columns = {
-                    '班级/Class': ['班级/Class', '班级', 'Class'],
-                    '姓名/Name': ['姓名/Name', '姓名', 'Name'],
-                    '分数/Score': ['分数/Score', '分数', 'Score']
-                }
-                
-                # 找到每个必要列的索引
-                column_indices = {}
-                missing_columns = []
-                for key, valid_names in required_columns.items():
-                    found = False
-                    for i, header in enumerate(headers):
-                        if header in valid_names:
-                            column_indices[key] = i
-                            found = True
-                            break
-                    if not found:
-                        missing_columns.append(key)
-                
-                if missing_columns:
-                    error_msg = f"文件 {file.filename} 缺少以下必要的列：\n" + "\n".join(missing_columns)
-                    logger.error(error_msg)
-                    error_messages.append(error_msg)
-                    continue
-                
-                # 处理数据
-                if file.filename.lower().endswith('.csv'):
-                    # 处理CSV数据
-                    for row_idx, row in df.iterrows():
-                        try:
-                            class_name = str(row[headers[column_indices['班级/Class']]]).strip()
-                            student_name = str(row[headers[column_indices['姓名/Name']]]).strip()
-                            score_value = row[headers[column_indices['分数/Score']]]
-                            
-                            # 验证班级和姓名
-                            if not class_name or not student_name:
-                                error_messages.append(f"文件 {file.filename} 第 {row_idx + 2} 行的班级或姓名为空")
-                                continue
-                            
-                            # 处理分数
-                            try:
-                                if pd.isna(score_value):
-                                    raise ValueError("分数不能为空")
-                                
-                                score = float(score_value)
-                                if not (0 <= score <= 10):
-                                    raise ValueError(f"分数 {score} 超出范围(0-10)")
-                                
-                                # 将分数添加到学生的分数列表中
-                                student_key = f"{class_name}:{student_name}"
-                                if student_key not in all_scores:
-                                    all_scores[student_key] = []
-                                all_scores[student_key].append(score)
-                                success_count += 1
-                                
-                            except (ValueError, TypeError) as e:
-                                error_messages.append(
-                                    f"文件 {file.filename} 第 {row_idx + 2} 行的分数格式不正确: '{score_value}'\n"
-                                    f"错误信息: {str(e)}"
-                                )
-                                continue
-                                
-                        except Exception as e:
-                            error_messages.append(f"处理文件 {file.filename} 第 {row_idx + 2} 行时出错: {str(e)}")
-                            continue
-                else:
-                    # 处理Excel数据
-                    for row_idx, row in enumerate(worksheet.iter_rows(min_row=2), start=2):
-                        try:
-                            class_name = str(row[column_indices['班级/Class']].value or '').strip()
-                            student_name = str(row[column_indices['姓名/Name']].value or '').strip()
-                            score_cell = row[column_indices['分数/Score']]
-                            
-                            # 验证班级和姓名
-                            if not class_name or not student_name:
-                                error_messages.append(f"文件 {file.filename} 第 {row_idx} 行的班级或姓名为空")
-                                continue
-                            
-                            # 处理分数
-                            try:
-                                score_value = score_cell.value
-                                if score_value is None or (isinstance(score_value, str) and not score_value.strip()):
-                                    raise ValueError("分数不能为空")
-                                
-                                if isinstance(score_value, (int, float)):
-                                    score = float(score_value)
-                                else:
-                                    score_str = str(score_value).strip()
-                                    score_str = score_str.replace('。', '.').replace('，', '.').replace(',', '.')
-                                    score = float(score_str)
-                                
-                                if not (0 <= score <= 10):
-                                    raise ValueError(f"分数 {score} 超出范围(0-10)")
-                                
-                                # 将分数添加到学生的分数列表中
-                                student_key = f"{class_name}:{student_name}"
-                                if student_key not in all_scores:
-                                    all_scores[student_key] = []
-                                all_scores[student_key].append(score)
-                                success_count += 1
-                                
-                            except (ValueError, TypeError) as e:
-                                error_messages.append(
-                                    f"文件 {file.filename} 第 {row_idx} 行的分数格式不正确: '{score_cell.value}'\n"
-                                    f"错误信息: {str(e)}"
-                                )
-                                continue
-                                
-                        except Exception as e:
-                            error_messages.append(f"处理文件 {file.filename} 第 {row_idx} 行时出错: {str(e)}")
-                            continue
-                        
+                path = await spool_upload(file)
+                spooled.append((file.filename, path))
             except Exception as e:
                 error_messages.append(f"处理文件 {file.filename} 时出错: {str(e)}")
-                continue
+        logger.info("Received %d/%d files for subject %s from %s", len(spooled), file_count, subject, judge_username)
+
+        if async_import:
+            job_id = create_import_job(redis_client, subject, judge_username, file_count)
+            task = asyncio.create_task(_run_import_job(job_id, subject, spooled, file_count, error_messages, judge_username))
+            _import_tasks.add(task)
+            task.add_done_callback(_import_tasks.discard)
+            logger.info("Queued import job %s for subject %s", job_id, subject)
+            return JSONResponse(
+                status_code=202,
+                content={"job_id": job_id, "status_url": f"/api/import_jobs/{job_id}"}
+            )
 
         # 计算并保存平均分
         try:
-            # 统计每个学生的评分情况
-            student_stats = {}
-            for student_key, scores in all_scores.items():
-                class_name, student_name = student_key.split(':')
-                if len(scores) < 1:
-                    error_messages.append(f"学生 {class_name} 班的 {student_name} 没有有效的分数")
-                    continue
-
-                # 计算统计数据
-                avg_score = sum(scores) / len(scores)
-                min_score = min(scores)
-                max_score = max(scores)
-                score_range = max_score - min_score
-                judge_count = len(scores)
-                
-                student_stats[student_key] = {
-                    "class_name": class_name,
-                    "student_name": student_name,
-                    "scores": scores,
-                    "avg_score": avg_score,
-                    "min_score": min_score,
-                    "max_score": max_score,
-                    "score_range": score_range,
-                    "judge_count": judge_count
-                }
-
-                # 保存到Redis
-                try:
-                    # 保存平均分到排行榜
-                    redis_client.zadd(f"leaderboard:{subject}", {f"{class_name}:{student_name}": avg_score})
-                    
-                    # 保存详细评分信息
-                    details_key = f"{subject}:{class_name}:{student_name}:details"
-                    redis_client.hset(details_key, mapping={
-                        "avg_score": str(avg_score),
-                        "min_score": str(min_score),
-                        "max_score": str(max_score),
-                        "score_range": str(score_range),
-                        "judge_count": str(judge_count)
-                    })
-                    
-                    # 保存每个评分
-                    for i, score in enumerate(scores):
-                        score_key = f"{subject}:{class_name}:{student_name}:judge{i+1}"
-                        redis_client.set(score_key, score)
-                    
-                    logger.info(f"Saved scores for {student_key}: {student_stats[student_key]}")
-                except Exception as e:
-                    error_messages.append(f"保存学生 {student_name} 的分数时出错: {str(e)}")
-                    continue
-
-            # 生成统计信息
-            if student_stats:
-                total_students = len(student_stats)
-                total_judges = sum(stats["judge_count"] for stats in student_stats.values())
-                avg_judges = total_judges / total_students if total_students > 0 else 0
-                students_with_3plus = sum(1 for stats in student_stats.values() if stats["judge_count"] >= 3)
-                
-                stats_key = f"stats:{subject}"
-                redis_client.hset(stats_key, mapping={
-                    "total_students": str(total_students),
-                    "total_judges": str(total_judges),
-                    "avg_judges": str(avg_judges),
-                    "students_with_3plus": str(students_with_3plus),
-                    "last_update": datetime.now().isoformat()
-                })
-                
-                logger.info(f"Subject {subject} stats: total_students={total_students}, "
-                          f"avg_judges={avg_judges:.2f}, students_with_3plus={students_with_3plus}")
-        
+            result = await run_score_import(redis_client, subject, spooled, file_count, error_messages, judge=judge_username)
         except Exception as e:
             logger.error(f"Error processing scores: {str(e)}")
             raise HTTPException(
                 status_code=500,
                 detail=f"处理分数时出错: {str(e)}\nError processing scores: {str(e)}"
             )
+        finally:
+            _remove_spooled(spooled)
+
+        if result.merged is not None:
+            _notify_board(subject, result.merged.updated, result.merged.removed)
 
         # 如果有错误，返回错误信息
-        if error_messages:
-            if success_count > 0:
-                message = (
-                    f"成功导入 {success_count} 条记录。\n"
-                    f"处理了 {file_count} 个文件。\n"
-                    f"平均每个学生有 {avg_judges:.1f} 位评委评分。\n"
-                    f"有 {students_with_3plus} 名学生获得了3位及以上评委的评分。\n"
-                    f"以下记录导入失败：\n" + "\n".join(error_messages)
-                )
-            else:
-                message = "\n".join(error_messages)
-            raise HTTPException(status_code=400, detail=message)
+        if result.error_messages:
+            raise HTTPException(status_code=400, detail=result.summary())
         
         return RedirectResponse(url=f"/leaderboard/{subject}", status_code=303)
         
@@ -575,6 +357,204 @@ async def upload_scores(
             detail=f"意外错误: {str(e)}\nUnexpected error: {str(e)}"
         )
 
+# 正在后台执行的导入任务，保留引用以免被垃圾回收
+_import_tasks = set()
+
+def _remove_spooled(spooled):
+    for _, path in spooled:
+        try:
+            os.unlink(path)
+        except OSError as e:
+            logger.warning("Could not remove spooled upload %s: %s", path, e)
+
+async def _run_import_job(job_id: str, subject: str, spooled, file_count: int, error_messages: List[str], judge: str):
+    """后台执行导入任务并记录进度"""
+    try:
+        update_import_job(redis_client, job_id, status="parsing")
+        result = await run_score_import(
+            redis_client, subject, spooled, file_count, error_messages,
+            progress=lambda **fields: update_import_job(redis_client, job_id, **fields),
+            judge=judge
+        )
+        if result.merged is not None:
+            _notify_board(subject, result.merged.updated, result.merged.removed)
+        update_import_job(
+            redis_client, job_id,
+            status="completed_with_errors" if result.error_messages else "completed",
+            errors=result.error_messages,
+            finished_at=datetime.now().isoformat()
+        )
+        logger.info("Import job %s finished: %d records, %d errors", job_id, result.success_count,
+                    len(result.error_messages))
+    except Exception as e:
+        logger.error(f"Import job {job_id} failed: {str(e)}")
+        update_import_job(
+            redis_client, job_id,
+            status="failed",
+            errors=error_messages + [f"处理分数时出错: {str(e)}"],
+            finished_at=datetime.now().isoformat()
+        )
+    finally:
+        _remove_spooled(spooled)
+
+@app.get("/api/import_jobs/{job_id}")
+async def import_job_status(request: Request, job_id: str, db: Session = Depends(get_db)):
+    """查询后台导入任务的进度和错误列表；只有提交任务的评委或管理员可以查询"""
+    judge_username = _require_judge(request, db)
+    job = get_import_job(redis_client, job_id)
+    if job is None:
+        return JSONResponse(status_code=404, content={"detail": "导入任务不存在 / Import job not found"})
+    if job.get("judge") != judge_username and judge_username not in ADMIN_USERS:
+        raise HTTPException(status_code=403, detail="只能查询自己提交的导入任务\nYou can only view your own import jobs")
+    return job
+
+# JSON 接口每次最多返回的行数
+API_MAX_LIMIT = 500
+
+def _encode_cursor(offset: int, member: str) -> str:
+    return base64.urlsafe_b64encode(json.dumps([offset, member], ensure_ascii=False).encode("utf-8")).decode("ascii")
+
+def _decode_cursor(cursor: str) -> Tuple[int, str]:
+    offset, member = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8"))
+    return int(offset), str(member)
+
+def _api_window(subject: str, version: int, start: int, stop: int) -> List[Dict[str, Any]]:
+    """读取排行榜窗口（按版本缓存），每行的 rank 为其在有序集合中的名次"""
+    return _cached_rows(subject, version, start, stop)
+
+def _api_response(request: Request, cache_key: tuple, create) -> Response:
+    """按版本缓存 JSON 接口的结果；版本未变化时返回 304"""
+    etag = make_etag(cache_key)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if _not_modified(request, etag):
+        return Response(status_code=304, headers=headers)
+    content = render_cache.get(cache_key)
+    if content is None:
+        content = create()
+        if isinstance(content, Response):
+            return content
+        content = ORJSONResponse(content=content).body
+        render_cache.put(cache_key, content, len(content))
+    return Response(content=content, media_type="application/json", headers=headers)
+
+@app.get("/api/leaderboard/{subject}")
+async def leaderboard_api(
+    request: Request,
+    subject: str,
+    offset: int = 0,
+    limit: int = 50,
+    cursor: Optional[str] = None,
+    around: Optional[str] = None,
+    k: int = 5
+):
+    """排行榜 JSON 接口
+
+    - offset/limit：按名次取一段；
+    - cursor：上一页返回的 next_cursor，从上一页最后一名之后继续（期间有变化时依然连续）；
+    - around=班级:姓名：返回该学生及前后各 k 名。
+    名次都通过有序集合的 O(log n) 操作定位，不扫描整个排行榜。
+    """
+    leaderboard_key = f"leaderboard:{subject}"
+    version = subject_version(redis_client, subject)
+    limit = min(max(1, limit), API_MAX_LIMIT)
+    k = min(max(0, k), API_MAX_LIMIT // 2)
+
+    if around is not None:
+        def create_around():
+            rank = redis_client.zrevrank(leaderboard_key, around)
+            if rank is None:
+                return ORJSONResponse(status_code=404, content={"detail": "学生不在排行榜中 / Entry not found"})
+            start = max(0, rank - k)
+            return {
+                "subject": subject,
+                "version": version,
+                "total": redis_client.zcard(leaderboard_key),
+                "member": around,
+                "rank": rank + 1,
+                "rows": _api_window(subject, version, start, rank + k),
+            }
+        return _api_response(request, ("api-around", subject, version, around, k), create_around)
+
+    if cursor is not None:
+        try:
+            offset, member = _decode_cursor(cursor)
+        except (ValueError, TypeError, binascii.Error):
+            return ORJSONResponse(status_code=400, content={"detail": "无效的游标 / Invalid cursor"})
+        # 上一页的最后一名仍在排行榜中时从它之后开始，否则退回到记录的位置
+        rank = redis_client.zrevrank(leaderboard_key, member)
+        offset = rank + 1 if rank is not None else offset
+    offset = max(0, offset)
+
+    def create_window():
+        rows = _api_window(subject, version, offset, offset + limit - 1)
+        total = redis_client.zcard(leaderboard_key)
+        next_cursor = None
+        if rows and offset + limit < total:
+            next_cursor = _encode_cursor(offset + limit, rows[-1]["member"])
+        return {
+            "subject": subject,
+            "version": version,
+            "total": total,
+            "offset": offset,
+            "limit": limit,
+            "rows": rows,
+            "next_cursor": next_cursor,
+        }
+    return _api_response(request, ("api-window", subject, version, offset, limit), create_window)
+
+@app.get("/api/leaderboard/{subject}/rank")
+async def leaderboard_rank_api(request: Request, subject: str, member: str):
+    """查询单个学生（班级:姓名）的名次和成绩"""
+    version = subject_version(redis_client, subject)
+
+    def create():
+        leaderboard_key = f"leaderboard:{subject}"
+        rank = redis_client.zrevrank(leaderboard_key, member)
+        sort_score = redis_client.zscore(leaderboard_key, member) if rank is not None else None
+        row = _build_rows(subject, [(member, sort_score)])[0] if sort_score is not None else None
+        if row is None:
+            return ORJSONResponse(status_code=404, content={"detail": "学生不在排行榜中 / Entry not found"})
+        row["rank"] = rank + 1
+        return {
+            "subject": subject,
+            "version": version,
+            "total": redis_client.zcard(leaderboard_key),
+            "rank": rank + 1,
+            "row": row,
+        }
+    return _api_response(request, ("api-rank", subject, version, member), create)
+
+@app.get("/api/leaderboard/{subject}/sheets")
+async def subject_sheets(subject: str):
+    """列出科目中已导入的评委文件"""
+    return {"subject": subject, "sheets": list_sheets(redis_client, subject)}
+
+@app.delete("/api/leaderboard/{subject}/sheets/{sheet_id:path}")
+async def retract_subject_sheet(request: Request, subject: str, sheet_id: str, db: Session = Depends(get_db)):
+    """撤回一个评委文件，只重新计算该文件涉及的学生；只有上传的评委或管理员可以撤回"""
+    judge_username = _require_judge(request, db)
+    sheet = list_sheets(redis_client, subject).get(sheet_id)
+    if sheet is None:
+        return JSONResponse(status_code=404, content={"detail": "评分文件不存在 / Sheet not found"})
+    if sheet.get("uploaded_by") != judge_username and judge_username not in ADMIN_USERS:
+        raise HTTPException(status_code=403, detail="只能撤回自己上传的评分文件\nYou can only retract your own sheets")
+    result = await run_in_merge_pool(retract_sheet, redis_client, subject, sheet_id)
+    if result is None:
+        return JSONResponse(status_code=404, content={"detail": "评分文件不存在 / Sheet not found"})
+    _notify_board(subject, result.updated, result.removed)
+    try:
+        await asyncio.get_running_loop().run_in_executor(None, save_sheets, subject, {}, None, [sheet_id])
+    except Exception as e:
+        logger.error(f"Error deleting sheet {sheet_id} of subject {subject} from database: {str(e)}")
+    logger.info("Sheet %s of subject %s retracted by %s", sheet_id, subject, judge_username)
+    return {
+        "subject": subject,
+        "sheet_id": sheet_id,
+        "students_updated": result.students_written,
+        "students_removed": result.students_removed,
+        "total_students": result.total_students,
+    }
+
 # 错误处理
 @app.exception_handler(HTTPException)
 async def http_exception_handler(request: Request, exc: HTTPException):
@@ -604,27 +584,242 @@ async def general_exception_handler(request: Request, exc: Exception):
 # Home page
 @app.get("/", response_class=HTMLResponse)
 async def home(request: Request):
-    logger.info("Accessing home page")
+    logger.debug("Accessing home page")
     return templates.TemplateResponse("index.html", {"request": request})
 
 # Login page
 @app.get("/login", response_class=HTMLResponse)
 async def login_page(request: Request):
-    logger.info("Accessing login page")
+    logger.debug("Accessing login page")
     return templates.TemplateResponse("login.html", {"request": request})
 
 # Register page
 @app.get("/register", response_class=HTMLResponse)
 async def register_page(request: Request):
-    logger.info("Accessing register page")
+    logger.debug("Accessing register page")
     return templates.TemplateResponse("register.html", {"request": request})
 
 # Submit score page
 @app.get("/submit_score", response_class=HTMLResponse)
 async def submit_score_page(request: Request):
-    logger.info("Accessing submit score page")
+    logger.debug("Accessing submit score page")
     return templates.TemplateResponse("submit_score.html", {"request": request})
 
+def _build_rows(subject: str, entries: List[Tuple[str, float]]) -> List[Optional[Dict[str, Any]]]:
+    """由排行榜成员和排序键生成数据行，学生的详细评分信息用一个管道批量读取（Redis 只需一次往返）
+
+    返回的列表与 entries 一一对应，不是 "班级:姓名" 形式的成员对应 None。
+    """
+    students = []
+    pipe = redis_client.pipeline(transaction=False)
+    for member, sort_score in entries:
+        # 解码 bytes 为字符串
+        if isinstance(member, bytes):
+            member = member.decode('utf-8')
+        parts = member.split(':')
+        if len(parts) < 2:
+            students.append(None)
+            continue
+        students.append((member, parts[0], parts[1], sort_score))
+        pipe.hgetall(f"{subject}:{parts[0]}:{parts[1]}:details")
+
+    details_list = []
+    if len(pipe):
+        try:
+            details_list = pipe.execute()
+        except Exception as e:
+            logger.error(f"Error reading leaderboard details for {subject}: {str(e)}")
+    details_iter = iter(details_list)
+
+    rows = []
+    for student in students:
+        if student is None:
+            rows.append(None)
+            continue
+        member, class_name, student_name, sort_score = student
+        # 缺失时使用排序键中编码的数据
+        details = next(details_iter, None) or {}
+        try:
+            rows.append(_build_row(member, class_name, student_name, sort_score, details))
+        except Exception as e:
+            logger.error(f"Error processing leaderboard entry {member}: {str(e)}")
+            rows.append(None)
+    return rows
+
+def _build_row(member: str, class_name: str, student_name: str, sort_score: float,
+               details: Dict[str, str]) -> Dict[str, Any]:
+    """由排行榜成员、排序键和学生的详细评分信息生成一行数据"""
+    average, judge_count, score_range = decode_sort_key(sort_score)
+    return {
+        "member": member,
+        "sort_key": sort_score,
+        "class_name": class_name,
+        "student_name": student_name,
+        "average": float(details.get("avg_score", average)),
+        "judge_count": int(float(details.get("judge_count", judge_count))),
+        "min_score": float(details.get("min_score", average)),
+        "max_score": float(details.get("max_score", average)),
+        "score_range": float(details.get("score_range", score_range))
+    }
+
+def _fetch_leaderboard_rows(subject: str, start: int, stop: int) -> List[Dict[str, Any]]:
+    """按存储顺序读取排行榜的一段，并补充每个学生的详细评分信息"""
+    rows = []
+    redis_scores = redis_client.zrevrange(f"leaderboard:{subject}", start, stop, withscores=True)
+    for position, score_info in enumerate(_build_rows(subject, redis_scores), start + 1):
+        if score_info is None:
+            continue
+        # 名次取成员在有序集合中的位置，与 zrevrank 一致（即使窗口中有被跳过的成员）
+        score_info["rank"] = position
+        rows.append(score_info)
+    # 每次读取只记录一条汇总，不逐行记录
+    logger.debug("Built %d rows for subject %s [%d:%d]", len(rows), subject, start, stop)
+    return rows
+
+# 一次写入涉及的学生超过该数量时不发送增量，让屏幕直接重新加载
+DELTA_MAX_ENTRIES = 500
+# 没有事件时发送心跳注释的间隔（秒），同时用于检测断开的连接
+STREAM_HEARTBEAT_SECONDS = 15
+
+broadcaster = LeaderboardBroadcaster(redis_client, shared=isinstance(redis_client, RemoteRedisClient))
+
+def _notify_board(subject: str, updated: List[str], removed: List[str]):
+    """写入提交后向所有连接的屏幕推送变化；每个事件只计算一次"""
+    try:
+        version = subject_version(redis_client, subject)
+        if len(updated) + len(removed) > DELTA_MAX_ENTRIES:
+            broadcaster.publish(subject, "reload", {"version": version}, version)
+            return
+        leaderboard_key = f"leaderboard:{subject}"
+        # 排序键和详细信息各用一个管道批量读取
+        pipe = redis_client.pipeline(transaction=False)
+        for member in updated:
+            pipe.zscore(leaderboard_key, member)
+        sort_scores = pipe.execute() if updated else []
+        present = [(member, sort_score) for member, sort_score in zip(updated, sort_scores) if sort_score is not None]
+        upserts = [row for row in _build_rows(subject, present) if row is not None]
+        broadcaster.publish(subject, "delta", {
+            "version": version,
+            "upserts": upserts,
+            "removed": removed,
+            "total": redis_client.zcard(leaderboard_key),
+        }, version)
+    except Exception as e:
+        logger.error(f"Error publishing leaderboard update for {subject}: {str(e)}")
+
+@app.get("/leaderboard/{subject}/stream")
+async def leaderboard_stream(request: Request, subject: str):
+    """Server-Sent Events：推送排行榜的变化（新增、更新、移除的学生）
+
+    连接后先发送 hello 事件（当前版本号），之后每次写入发送一个 delta 事件，
+    事件 id 为写入后的版本号；客户端发现版本不连续时应重新加载页面。
+    """
+    queue = broadcaster.subscribe(subject)
+
+    async def events():
+        try:
+            version = subject_version(redis_client, subject)
+            yield b"retry: 3000\n\n" + format_event("hello", {"version": version}, version)
+            while True:
+                try:
+                    payload = await asyncio.wait_for(queue.get(), timeout=STREAM_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    yield b": ping\n\n"
+                    continue
+                yield payload
+        finally:
+            broadcaster.unsubscribe(subject, queue)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+# 排行榜数据和渲染好的页面按 (科目, 版本, 参数) 缓存，科目有写入时版本号变化
+render_cache = RenderCache(RENDER_CACHE_MAX_BYTES)
+# 每行数据的大致内存占用，用于估算缓存大小
+ROW_SIZE_ESTIMATE = 512
+
+def _cached_rows(subject: str, version: int, start: int, stop: int) -> List[Dict[str, Any]]:
+    """读取排行榜窗口，同一版本只从存储中读取一次"""
+    def create():
+        rows = _fetch_leaderboard_rows(subject, start, stop)
+        return rows, ROW_SIZE_ESTIMATE * max(len(rows), 1)
+    return render_cache.get_or_create(("rows", subject, version, start, stop), create)
+
+def _http_date(timestamp: Optional[str]) -> Optional[str]:
+    """把存储中的 ISO 时间（本地时间）转换为 HTTP 日期格式"""
+    if not timestamp:
+        return None
+    try:
+        return format_datetime(datetime.fromisoformat(timestamp).astimezone(timezone.utc), usegmt=True)
+    except ValueError:
+        return None
+
+def _not_modified(request: Request, etag: str, last_modified: Optional[str] = None) -> bool:
+    """按 If-None-Match（优先）或 If-Modified-Since 判断客户端缓存是否仍然有效"""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = [tag.strip().replace("W/", "", 1) for tag in if_none_match.split(",")]
+        return "*" in tags or etag in tags
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified:
+        try:
+            return parsedate_to_datetime(last_modified) <= parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+    return False
+
+def _version_updated_at(subject: str, version: int) -> Optional[str]:
+    """版本 version 对应写入的时间；读取期间又有新的写入时返回 None（不发送 Last-Modified）"""
+    updated_at = subject_updated_at(redis_client, subject)
+    if subject_version(redis_client, subject) != version:
+        return None
+    return updated_at
+
+def _last_modified(updated_at: Optional[str]) -> Optional[str]:
+    """Last-Modified 只精确到秒，同一秒内可能还有写入，这一秒过去之后才发送"""
+    if not updated_at:
+        return None
+    try:
+        written = datetime.fromisoformat(updated_at)
+    except ValueError:
+        return None
+    if written.replace(microsecond=0) >= datetime.now().replace(microsecond=0):
+        return None
+    return _http_date(updated_at)
+
+def _cached_page(request: Request, subject: str, version: int, cache_key: tuple, render) -> Response:
+    """同一版本的页面只渲染一次；缓存键包含访问地址，因为模板中的静态文件链接依赖它
+
+    版本号在读取数据之前获取，缓存的内容不会比版本号对应的数据更旧。
+    客户端带着当前版本的 ETag 再次请求时直接返回 304，不读取存储也不渲染模板。
+    Last-Modified 取使版本号变化的那次写入的时间，任何改变排行榜的写入都会更新它。
+    """
+    key = cache_key + (str(request.base_url),)
+    etag = make_etag(key)
+    cached = render_cache.get(key)
+    last_modified = _last_modified(cached[1]) if cached is not None else None
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if last_modified:
+        headers["Last-Modified"] = last_modified
+    if _not_modified(request, etag, last_modified):
+        return Response(status_code=304, headers=headers)
+
+    if cached is None:
+        response = render()
+        if response.status_code != 200:
+            return response
+        cached = (response.body, _version_updated_at(subject, version))
+        render_cache.put(key, cached, len(response.body))
+        last_modified = _last_modified(cached[1])
+        if last_modified:
+            headers["Last-Modified"] = last_modified
+    return HTMLResponse(content=cached[0], headers=headers)
+
 # Leaderboard page
 @app.get("/leaderboard/{subject}", response_class=HTMLResponse)
 async def leaderboard_page(
@@ -635,88 +830,49 @@ async def leaderboard_page(
     db: Session = Depends(get_db)
 ):
     try:
-        # 获取Redis中的所有分数（实时排行榜）
-        redis_scores = redis_client.zrevrange(f"leaderboard:{subject}", 0, -1, withscores=True)
-        logger.debug(f"Redis scores for {subject}: {redis_scores}")
+        version = subject_version(redis_client, subject)
 
-        # 处理Redis分数
-        all_scores = []
-        for key, avg_score in redis_scores:
-            try:
-                parts = key.split(':')
-                if len(parts) >= 2:
-                    class_name = parts[0]
-                    student_name = parts[1]
-                    
-                    # 获取详细信息
-                    details_key = f"{subject}:{class_name}:{student_name}:details"
-                    details = redis_client.hgetall(details_key)
-                    
-                    if details:
-                        score_info = {
-                            "class_name": class_name,
-                            "student_name": student_name,
-                            "average": float(avg_score),
-                            "judge_count": int(float(details.get("judge_count", 0))),
-                            "min_score": float(details.get("min_score", avg_score)),
-                            "max_score": float(details.get("max_score", avg_score)),
-                            "score_range": float(details.get("score_range", 0))
-                        }
-                    else:
-                        # 如果没有详细信息，使用基本信息
-                        score_info = {
-                            "class_name": class_name,
-                            "student_name": student_name,
-                            "average": float(avg_score),
-                            "judge_count": 1,
-                            "min_score": float(avg_score),
-                            "max_score": float(avg_score),
-                            "score_range": 0
-                        }
-                    
-                    all_scores.append(score_info)
-                    logger.debug(f"Processed score: {score_info}")
-                    
-            except Exception as e:
-                logger.error(f"Error processing leaderboard entry: {str(e)}")
-                continue
-
-        # 按平均分降序排序
-        all_scores.sort(key=lambda x: (-x["average"], -x["judge_count"], x["score_range"]))
-
-        # 计算分页信息
-        total_items = len(all_scores)
-        total_pages = (total_items + page_size - 1) // page_size
-        page = min(max(1, page), total_pages) if total_pages > 0 else 1
-        start_idx = (page - 1) * page_size
-        end_idx = start_idx + page_size
-        paginated_scores = all_scores[start_idx:end_idx]
-
-        # 获取统计信息
-        stats_key = f"stats:{subject}"
-        stats = redis_client.hgetall(stats_key) or {}
-        
-        stats_info = {
-            "total_students": int(float(stats.get("total_students", len(all_scores)))),
-            "avg_judges": float(stats.get("avg_judges", 0)),
-            "students_with_3plus": int(float(stats.get("students_with_3plus", 0))),
-            "last_update": stats.get("last_update", "N/A")
-        }
+        def render():
+            nonlocal page, page_size
+            # 通过有序集合的基数计算分页信息，只取当前页的窗口
+            leaderboard_key = f"leaderboard:{subject}"
+            page_size = max(1, page_size)
+            total_items = redis_client.zcard(leaderboard_key)
+            total_pages = (total_items + page_size - 1) // page_size
+            page = min(max(1, page), total_pages) if total_pages > 0 else 1
+            start_idx = (page - 1) * page_size
+            end_idx = start_idx + page_size
+            # 存储顺序已包含全部排序规则，直接作为最终排名
+            paginated_scores = _cached_rows(subject, version, start_idx, end_idx - 1)
 
-        logger.info(f"Processed {len(paginated_scores)} scores for subject {subject} (page {page}/{total_pages})")
-
-        return templates.TemplateResponse(
-            "leaderboard.html", 
-            {
-                "request": request, 
-                "subject": subject, 
-                "leaderboard": paginated_scores,
-                "stats": stats_info,
-                "current_page": page,
-                "total_pages": total_pages,
-                "total_items": total_items
+            # 获取统计信息
+            stats_key = f"stats:{subject}"
+            stats = redis_client.hgetall(stats_key) or {}
+            
+            stats_info = {
+                "total_students": int(float(stats.get("total_students", total_items))),
+                "avg_judges": float(stats.get("avg_judges", 0)),
+                "students_with_3plus": int(float(stats.get("students_with_3plus", 0))),
+                "last_update": stats.get("last_update", "N/A")
             }
-        )
+
+            logger.debug("Rendered %d scores for subject %s (page %d/%d)", len(paginated_scores), subject, page,
+                         total_pages)
+
+            return templates.TemplateResponse(
+                "leaderboard.html", 
+                {
+                    "request": request, 
+                    "subject": subject, 
+                    "leaderboard": paginated_scores,
+                    "stats": stats_info,
+                    "current_page": page,
+                    "total_pages": total_pages,
+                    "total_items": total_items
+                }
+            )
+
+        return _cached_page(request, subject, version, ("leaderboard", subject, version, page, page_size), render)
     except Exception as e:
         logger.error(f"Error rendering leaderboard: {str(e)}")
         raise HTTPException(
@@ -729,7 +885,11 @@ async def leaderboard_page(
 async def login_form(username: str = Form(...), password: str = Form(...), db: Session = Depends(get_db)):
     try:
         user = db.query(User).filter(User.username == username).first()
-        if not user or not verify_password(password, user.hashed_password):
+        hashed_password = user.hashed_password if user else None
+        # 等待 bcrypt 之前归还数据库连接，排队的登录不会占满连接池
+        db.rollback()
+        # bcrypt 在密码线程池中执行，登录高峰不会阻塞排行榜的读取
+        if not user or not await verify_password_async(password, hashed_password):
             raise HTTPException(
                 status_code=400, 
                 detail="用户名或密码错误\nInvalid username or password"
@@ -748,6 +908,12 @@ async def login_form(username: str = Form(...), password: str = Form(...), db: S
         
     except HTTPException:
         raise
+    except PasswordPoolBusy as e:
+        logger.warning("Login rejected, password pool busy: %s", e)
+        raise HTTPException(
+            status_code=503,
+            detail="登录人数过多，请稍后重试\nToo many logins in progress, please retry shortly"
+        )
     except Exception as e:
         logger.error(f"Login error: {str(e)}")
         raise HTTPException(
@@ -761,7 +927,15 @@ async def register_form(username: str = Form(...), password: str = Form(...), db
     existing_user = db.query(User).filter(User.username == username).first()  # Corrected query
     if existing_user:
         raise HTTPException(status_code=400, detail="Username already registered")
-    hashed_password = get_password_hash(password)
+    db.rollback()
+    try:
+        hashed_password = await get_password_hash_async(password)
+    except PasswordPoolBusy as e:
+        logger.warning("Registration rejected, password pool busy: %s", e)
+        raise HTTPException(
+            status_code=503,
+            detail="注册人数过多，请稍后重试\nToo many registrations in progress, please retry shortly"
+        )
     new_user = User(username=username, hashed_password=hashed_password)
     db.add(new_user)
     db.commit()
@@ -783,39 +957,38 @@ async def submit_score_form(
     if not access_token:
         raise HTTPException(status_code=401, detail="Not authenticated")
     try:
-        payload = decode_token(access_token)
-        username = payload.get("sub")
-        user = db.query(User).filter(User.username == username).first()
-        if not user:
-            raise HTTPException(status_code=404, detail="User not found")
-
-        # Add score to Redis leaderboard
-        redis_client.zadd(f"leaderboard:{subject}", {username: score})
+        identity = authenticator.authenticate(db, access_token)
+    except AuthenticationError as e:
+        logger.warning("Token validation error: %s", e)
+        raise HTTPException(status_code=401, detail="Invalid token")
+    username = identity.username
 
-        # Save score to SQLite database
-        new_score = Score(user_id=user.id, subject=subject, score=score, timestamp=datetime.utcnow())
-        db.add(new_score)
-        db.commit()
+    # 单独提交的分数不是学生成绩，只保存到 SQLite，不写入排行榜存储（排行榜只显示学生）
+    # Save score to SQLite database
+    new_score = Score(user_id=identity.user_id, subject=subject, score=score, timestamp=datetime.utcnow())
+    db.add(new_score)
+    db.commit()
 
-        return RedirectResponse(url=f"/leaderboard/{subject}", status_code=303)
-    except HTTPException:
-        raise HTTPException(status_code=401, detail="Invalid token")
+    return RedirectResponse(url=f"/leaderboard/{subject}", status_code=303)
 
 @app.get("/api/leaderboards")
-async def get_leaderboards():
+async def get_leaderboards(request: Request):
     """获取所有可用的排行榜科目"""
     try:
-        # 获取所有分数键
-        score_keys = redis_client.scan_iter("scores:*")
-        # 提取科目名称
-        subjects = set()
-        for key in score_keys:
-            # 从键名中提取科目名称 (scores:subject:*)
-            parts = key.split(":")
-            if len(parts) >= 2:
-                subjects.add(parts[1])
-        
-        return {"subjects": sorted(list(subjects))}
+        # 任意科目有写入时全局版本号变化，未变化时直接返回 304
+        key = ("leaderboards", global_version(redis_client))
+        etag = make_etag(key)
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        if _not_modified(request, etag):
+            return Response(status_code=304, headers=headers)
+
+        def create():
+            # 只读取科目登记表，与键空间的大小无关
+            boards = list_subjects(redis_client)
+            content = {"subjects": list(boards), "boards": boards}
+            return content, ROW_SIZE_ESTIMATE * max(len(boards), 1)
+
+        return JSONResponse(content=render_cache.get_or_create(key, create), headers=headers)
     except Exception as e:
         logger.error(f"获取排行榜列表时出错: {str(e)}")
         raise HTTPException(status_code=500, detail="获取排行榜列表失败")
@@ -827,64 +1000,25 @@ async def leaderboard_fullscreen(
     db: Session = Depends(get_db)
 ):
     try:
-        # 获取Redis中的所有分数（实时排行榜）
-        redis_scores = redis_client.zrevrange(f"leaderboard:{subject}", 0, -1, withscores=True)
-        logger.debug(f"Redis scores for {subject} fullscreen: {redis_scores}")
+        version = subject_version(redis_client, subject)
 
-        # 处理Redis分数
-        all_scores = []
-        for key, avg_score in redis_scores:
-            try:
-                parts = key.split(':')
-                if len(parts) >= 2:
-                    class_name = parts[0]
-                    student_name = parts[1]
-                    
-                    # 获取详细信息
-                    details_key = f"{subject}:{class_name}:{student_name}:details"
-                    details = redis_client.hgetall(details_key)
-                    
-                    if details:
-                        score_info = {
-                            "class_name": class_name,
-                            "student_name": student_name,
-                            "average": float(avg_score),
-                            "judge_count": int(float(details.get("judge_count", 0))),
-                            "min_score": float(details.get("min_score", avg_score)),
-                            "max_score": float(details.get("max_score", avg_score)),
-                            "score_range": float(details.get("score_range", 0))
-                        }
-                    else:
-                        score_info = {
-                            "class_name": class_name,
-                            "student_name": student_name,
-                            "average": float(avg_score),
-                            "judge_count": 1,
-                            "min_score": float(avg_score),
-                            "max_score": float(avg_score),
-                            "score_range": 0
-                        }
-                    
-                    all_scores.append(score_info)
-                    logger.debug(f"Processed score for fullscreen: {score_info}")
-                    
-            except Exception as e:
-                logger.error(f"Error processing leaderboard entry for fullscreen: {str(e)}")
-                continue
+        def render():
+            # 获取Redis中的所有分数（实时排行榜，已按最终排名排序）
+            all_scores = _cached_rows(subject, version, 0, -1)
 
-        # 按平均分降序排序
-        all_scores.sort(key=lambda x: (-x["average"], -x["judge_count"], x["score_range"]))
+            logger.debug("Rendered %d scores for fullscreen display of subject %s", len(all_scores), subject)
 
-        logger.info(f"Processed {len(all_scores)} scores for fullscreen display")
+            return templates.TemplateResponse(
+                "leaderboard_fullscreen.html", 
+                {
+                    "request": request, 
+                    "subject": subject, 
+                    "leaderboard": all_scores,
+                    "version": version
+                }
+            )
 
-        return templates.TemplateResponse(
-            "leaderboard_fullscreen.html", 
-            {
-                "request": request, 
-                "subject": subject, 
-                "leaderboard": all_scores
-            }
-        )
+        return _cached_page(request, subject, version, ("fullscreen", subject, version), render)
     except Exception as e:
         logger.error(f"Error rendering fullscreen leaderboard: {str(e)}")
         raise HTTPException(
@@ -895,60 +1029,112 @@ async def leaderboard_fullscreen(
 @app.get("/leaderboard/{subject}/winners", response_class=HTMLResponse)
 async def winners_display(request: Request, subject: str, count: int = 5):
     try:
-        # 获取排行榜数据
-        redis_scores = redis_client.zrevrange(f"leaderboard:{subject}", 0, -1, withscores=True)
-        all_scores = []
-        
-        for member, score in redis_scores:
-            try:
-                # 解码 bytes 为字符串
-                if isinstance(member, bytes):
-                    member = member.decode('utf-8')
-                
-                # 从字符串中提取班级和姓名
-                class_name, student_name = member.split(':')
-                
-                # 获取详细信息
-                details_key = f"{subject}:{class_name}:{student_name}:details"
-                details = redis_client.hgetall(details_key)
-                
-                score_info = {
-                    "class_name": class_name,
-                    "student_name": student_name,
-                    "average": float(score),
-                    "judge_count": int(float(details.get("judge_count", 1))),
-                    "min_score": float(details.get("min_score", score)),
-                    "max_score": float(details.get("max_score", score)),
-                    "score_range": float(details.get("score_range", 0))
+        version = subject_version(redis_client, subject)
+
+        def render():
+            nonlocal count
+            # 限制显示的获奖者数量，只读取前 count 名
+            total_items = redis_client.zcard(f"leaderboard:{subject}")
+            count = max(min(count, total_items), 1)  # 确保count在1和总数之间
+            winners = _cached_rows(subject, version, 0, count - 1)
+            logger.debug("Rendered %d winners for subject %s", len(winners), subject)
+
+            return templates.TemplateResponse(
+                "winners_display.html",
+                {
+                    "request": request,
+                    "subject": subject,
+                    "winners": winners,
+                    "version": version
                 }
-                
-                all_scores.append(score_info)
-                logger.info(f"Processed winner: {score_info}")
-                
-            except Exception as e:
-                logger.error(f"Error processing winner {member}: {str(e)}")
-                continue
-            
-        # 按平均分数排序
-        all_scores.sort(key=lambda x: (-x["average"], -x["judge_count"], x["score_range"]))
-        
-        # 限制显示的获奖者数量
-        count = max(min(count, len(all_scores)), 1)  # 确保count在1和总数之间
-        winners = all_scores[:count]
-        
-        return templates.TemplateResponse(
-            "winners_display.html",
-            {
-                "request": request,
-                "subject": subject,
-                "winners": winners
-            }
-        )
+            )
+
+        return _cached_page(request, subject, version, ("winners", subject, version, count), render)
     except Exception as e:
         logger.error(f"Error in winners display: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/health")
 async def health_check():
-    """健康检查端点"""
-    return {"status": "healthy", "timestamp": datetime.now().isoformat()}
\ No newline at end of file
+    """健康检查端点；启动预热完成之前返回 503，负载均衡器据此决定是否转发流量
+
+    预热出错时存储中只有部分数据，返回 503 和 status "degraded"（错误信息见 warmup.error）。
+    """
+    if warmup_state.ready:
+        status = "healthy"
+    elif warmup_state.error is not None:
+        status = "degraded"
+    else:
+        status = "warming_up"
+    content = {
+        "status": status,
+        "timestamp": datetime.now().isoformat(),
+        "warmup": warmup_state.stats(),
+        "password_pool": password_pool.stats(),
+        "auth_cache": authenticator.stats()
+    }
+    return JSONResponse(status_code=200 if warmup_state.ready else 503, content=content)
+
+# 在抓取时读取的指标：线程池、缓存和连接数
+def _stats_metric(name: str, documentation: str, metric_type: str, stats, field: str):
+    return REGISTRY.register(CallbackMetric(name, documentation, metric_type, lambda: [((), stats()[field])]))
+
+_stats_metric("password_pool_waiting", "Password hashes waiting for a worker.", "gauge", password_pool.stats, "waiting")
+_stats_metric("password_pool_running", "Password hashes in progress.", "gauge", password_pool.stats, "running")
+_stats_metric("password_pool_rejected_total", "Logins rejected because the queue was full.", "counter",
+              password_pool.stats, "rejected")
+_stats_metric("password_pool_wait_seconds_total", "Time spent waiting for a password worker.", "counter",
+              password_pool.stats, "wait_seconds_total")
+_stats_metric("render_cache_hits_total", "Render cache hits.", "counter", render_cache.stats, "hits")
+_stats_metric("render_cache_misses_total", "Render cache misses.", "counter", render_cache.stats, "misses")
+_stats_metric("render_cache_bytes", "Approximate size of the render cache.", "gauge", render_cache.stats, "bytes")
+_stats_metric("token_cache_hits_total", "Validated token cache hits.", "counter", authenticator.tokens.stats, "hits")
+_stats_metric("token_cache_misses_total", "Validated token cache misses.", "counter",
+              authenticator.tokens.stats, "misses")
+REGISTRY.register(CallbackMetric("leaderboard_stream_connections", "Open Server-Sent Events connections.",
+                                 "gauge", lambda: [((), broadcaster.connection_count())]))
+REGISTRY.register(CallbackMetric("warmup_ready", "1 once the store has been warmed from SQLite.",
+                                 "gauge", lambda: [((), 1 if warmup_state.ready else 0)]))
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus 文本格式的指标"""
+    return Response(content=REGISTRY.render(), media_type=CONTENT_TYPE)
+
+def _require_admin(request: Request, db: Session) -> str:
+    """验证评委身份并要求其在 ADMIN_USERS 中，返回用户名"""
+    username = _require_judge(request, db)
+    if username not in ADMIN_USERS:
+        raise HTTPException(status_code=403, detail="需要管理员权限\nAdministrator access required")
+    return username
+
+@app.get("/admin/profile")
+async def profile_worker(
+    request: Request,
+    seconds: float = 10,
+    interval: float = 0.01,
+    idle: bool = False,
+    db: Session = Depends(get_db)
+):
+    """对当前 worker 的所有线程采样 seconds 秒，返回折叠栈（flamegraph.pl、speedscope 可直接读取）
+
+    采样在线程中进行，事件循环照常处理请求，其调用栈以 event-loop 为根；
+    idle=true 时也保留线程空闲等待的样本。
+    """
+    admin = _require_admin(request, db)
+    db.rollback()
+    seconds = min(max(seconds, 0.1), PROFILE_MAX_SECONDS)
+    interval = max(interval, 0.001)
+    thread_names = {threading.get_ident(): "event-loop"}
+    logger.info("Profiling worker for %.1fs at %.0fms intervals, requested by %s", seconds, interval * 1000, admin)
+    try:
+        stacks = await asyncio.get_running_loop().run_in_executor(
+            None, profiler.profile, seconds, interval, idle, thread_names
+        )
+    except ProfilerBusy:
+        raise HTTPException(status_code=409, detail="已有采样正在进行\nA profile is already running")
+    return Response(content=format_collapsed(stacks), media_type="text/plain", headers={
+        "Cache-Control": "no-store",
+        "X-Profile-Samples": str(profiler.samples),
+        "X-Profile-Seconds": f"{profiler.seconds:.2f}",
+    })
@@ -0,0 +1,203 @@
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+import json
+import logging
+import math
+
+from .cache import bump_version
+from .ranking import encode_sort_key
+from .subjects import record_subject
+
+logger = logging.getLogger(__name__)
+
+# 每个学生保存所有评委文件给出的分数：字段为文件 ID，同一文件中重复的学生记为 "文件ID#2"、"文件ID#3" ...
+JUDGES_KEY = "{subject}:{student}:judges"
+DETAILS_KEY = "{subject}:{student}:details"
+# 每个文件包含哪些学生以及各有几条记录，替换或撤回时只需要处理这些学生
+SHEET_KEY = "sheet:{subject}:{sheet_id}"
+SHEETS_KEY = "sheets:{subject}"
+STATS_KEY = "stats:{subject}"
+LEADERBOARD_KEY = "leaderboard:{subject}"
+MERGE_LOCK_KEY = "lock:merge:{subject}"
+
+
+@dataclass
+class MergeResult:
+    """一次合并后的结果，统计信息针对整个科目"""
+    students_written: int = 0
+    students_removed: int = 0
+    total_students: int = 0
+    total_judges: int = 0
+    avg_judges: float = 0.0
+    students_with_3plus: int = 0
+    updated: List[str] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+
+
+def make_sheet_id(judge: Optional[str], filename: str) -> str:
+    """评委文件的 ID：按 (上传的评委, 文件名) 区分，不同评委上传同名的模板文件互不覆盖"""
+    return f"{judge}/{filename}" if judge else filename
+
+
+def judge_fields(sheet_id: str, count: int) -> List[str]:
+    """一个文件中同一学生的第 1..count 条记录对应的字段名"""
+    return [sheet_id] + [f"{sheet_id}#{number}" for number in range(2, count + 1)]
+
+
+def student_details(scores: List[float]) -> Dict[str, str]:
+    """由一个学生的全部分数计算详细信息；使用 fsum，结果与分数的先后顺序无关"""
+    total = math.fsum(scores)
+    min_score = min(scores)
+    max_score = max(scores)
+    return {
+        "avg_score": str(total / len(scores)),
+        "min_score": str(min_score),
+        "max_score": str(max_score),
+        "score_range": str(max_score - min_score),
+        "judge_count": str(len(scores)),
+        "score_sum": str(total),
+    }
+
+
+def merge_sheets(store: Any, subject: str, sheets: Dict[str, Dict[str, List[float]]],
+                 retract: Iterable[str] = (), uploaded_by: Optional[str] = None) -> MergeResult:
+    """把评委文件增量合并到排行榜
+
+    sheets 为 文件ID（见 make_sheet_id）→ {class}:{name} → 分数列表；已存在的同 ID 文件会被替换。
+    retract 中的文件会被撤回。只读写这些文件涉及的学生，其余学生不受影响，
+    每个受影响学生的结果都由其全部评委分数重新计算，与整体重算完全一致。
+    """
+    retract = [sheet_id for sheet_id in retract if sheet_id not in sheets]
+    sheet_ids = list(sheets) + retract
+    result = MergeResult()
+
+    with store.lock(MERGE_LOCK_KEY.format(subject=subject)):
+        # 读取这些文件之前的内容以及当前统计信息
+        reads = store.pipeline(transaction=False)
+        for sheet_id in sheet_ids:
+            reads.hgetall(SHEET_KEY.format(subject=subject, sheet_id=sheet_id))
+        reads.hgetall(STATS_KEY.format(subject=subject))
+        reads.zcard(LEADERBOARD_KEY.format(subject=subject))
+        *old_sheets, stats, board_size = reads.execute()
+        old_sheets = [dict(value or {}) for value in old_sheets]
+        stats = dict(stats or {})
+
+        touched = set()
+        for old_sheet in old_sheets:
+            touched.update(old_sheet)
+        for entries in sheets.values():
+            touched.update(entries)
+        touched = list(touched)
+
+        reads = store.pipeline(transaction=False)
+        for student in touched:
+            reads.hgetall(JUDGES_KEY.format(subject=subject, student=student))
+        judge_maps = [dict(value or {}) for value in reads.execute()]
+
+        total_students = int(stats.get("total_students", 0))
+        total_judges = int(stats.get("total_judges", 0))
+        students_with_3plus = int(stats.get("students_with_3plus", 0))
+
+        pipe = store.pipeline(transaction=True)
+        leaderboard_mapping = {}
+        removed = []
+        for student, judges in zip(touched, judge_maps):
+            old_count = len(judges)
+            for sheet_id, old_sheet in zip(sheet_ids, old_sheets):
+                for judge_field in judge_fields(sheet_id, int(old_sheet.get(student, 0))):
+                    judges.pop(judge_field, None)
+            for sheet_id, entries in sheets.items():
+                scores = entries.get(student)
+                if scores:
+                    judges.update(zip(judge_fields(sheet_id, len(scores)), map(str, scores)))
+            new_count = len(judges)
+
+            total_students += (new_count > 0) - (old_count > 0)
+            board_size += (new_count > 0) - (old_count > 0)
+            total_judges += new_count - old_count
+            students_with_3plus += (new_count >= 3) - (old_count >= 3)
+
+            judges_key = JUDGES_KEY.format(subject=subject, student=student)
+            details_key = DETAILS_KEY.format(subject=subject, student=student)
+            pipe.delete(judges_key)
+            if not judges:
+                pipe.delete(details_key)
+                removed.append(student)
+                continue
+            details = student_details([float(score) for score in judges.values()])
+            pipe.hset(judges_key, mapping=judges)
+            pipe.hset(details_key, mapping=details)
+            leaderboard_mapping[student] = encode_sort_key(
+                float(details["avg_score"]), new_count, float(details["score_range"])
+            )
+
+        leaderboard_key = LEADERBOARD_KEY.format(subject=subject)
+        if leaderboard_mapping:
+            pipe.zadd(leaderboard_key, leaderboard_mapping)
+        if removed:
+            pipe.zrem(leaderboard_key, *removed)
+
+        # 更新文件登记
+        now = datetime.now().isoformat()
+        sheets_key = SHEETS_KEY.format(subject=subject)
+        for sheet_id, entries in sheets.items():
+            sheet_key = SHEET_KEY.format(subject=subject, sheet_id=sheet_id)
+            pipe.delete(sheet_key)
+            pipe.hset(sheet_key, mapping={student: str(len(scores)) for student, scores in entries.items()})
+            pipe.hset(sheets_key, mapping={sheet_id: json.dumps({
+                "rows": sum(len(scores) for scores in entries.values()),
+                "students": len(entries),
+                "uploaded_by": uploaded_by,
+                "uploaded_at": now,
+            }, ensure_ascii=False)})
+        for sheet_id in retract:
+            pipe.delete(SHEET_KEY.format(subject=subject, sheet_id=sheet_id))
+        if retract:
+            pipe.hdel(sheets_key, *retract)
+
+        # 统计信息按变化量更新，不需要遍历整个科目
+        stats_key = STATS_KEY.format(subject=subject)
+        avg_judges = total_judges / total_students if total_students > 0 else 0
+        if total_students > 0:
+            pipe.hset(stats_key, mapping={
+                "total_students": str(total_students),
+                "total_judges": str(total_judges),
+                "avg_judges": str(avg_judges),
+                "students_with_3plus": str(students_with_3plus),
+                "last_update": now
+            })
+        else:
+            pipe.delete(stats_key)
+
+        # 登记的人数以有序集合的大小为准
+        record_subject(pipe, subject, board_size, now)
+        bump_version(pipe, subject)
+        pipe.execute()
+
+    result.students_written = len(leaderboard_mapping)
+    result.students_removed = len(removed)
+    result.total_students = total_students
+    result.total_judges = total_judges
+    result.avg_judges = avg_judges
+    result.students_with_3plus = students_with_3plus
+    result.updated = list(leaderboard_mapping)
+    result.removed = removed
+    logger.info("Merged %d sheets and retracted %d for subject %s: %d students updated, %d removed",
+                len(sheets), len(retract), subject, result.students_written, result.students_removed)
+    return result
+
+
+def retract_sheet(store: Any, subject: str, sheet_id: str) -> Optional[MergeResult]:
+    """撤回一个评委文件，文件不存在时返回 None"""
+    if sheet_id not in store.hgetall(SHEETS_KEY.format(subject=subject)):
+        return None
+    return merge_sheets(store, subject, {}, retract=[sheet_id])
+
+
+def list_sheets(store: Any, subject: str) -> Dict[str, Dict[str, Any]]:
+    """列出科目中已导入的评委文件"""
+    return {
+        sheet_id: json.loads(meta)
+        for sheet_id, meta in store.hgetall(SHEETS_KEY.format(subject=subject)).items()
+    }
@@ -0,0 +1,294 @@
+from bisect import bisect_left
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+import asyncio
+import functools
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Prometheus 文本格式（0.0.4），charset 由 Starlette 添加
+CONTENT_TYPE = "text/plain; version=0.0.4"
+
+Labels = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Labels, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels: Labels = (), amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for labels, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}")
+        return lines
+
+
+class Histogram:
+    """累积直方图；每个标签组合保存各桶计数、总和与次数"""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[Labels, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, labels: Labels, value: float) -> None:
+        # 前 len(buckets)+1 个元素是各桶（含 +Inf）的非累积计数，最后两个是总和与次数
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 3)
+            series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            snapshot = {labels: list(series) for labels, series in self._series.items()}
+        for labels, series in sorted(snapshot.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}")
+            label_text = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_text} {_format_value(series[-2])}")
+            lines.append(f"{self.name}_count{label_text} {int(series[-1])}")
+        return lines
+
+
+class CallbackMetric:
+    """在抓取时才读取数值的指标，用于导出其他组件已有的统计（线程池、缓存等）"""
+
+    def __init__(self, name: str, documentation: str, metric_type: str,
+                 callback: Callable[[], Iterable[Tuple[Labels, float]]], labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.metric_type = metric_type
+        self.callback = callback
+        self.labelnames = tuple(labelnames)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.metric_type}"]
+        try:
+            for labels, value in self.callback():
+                lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}")
+        except Exception as e:
+            logger.error(f"Error collecting metric {self.name}: {str(e)}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, Any] = {}
+
+    def register(self, metric):
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+HTTP_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+STORE_BUCKETS = (0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.05, 0.1)
+DB_BUCKETS = (0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.5, 1, 5)
+LOOP_LAG_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5)
+
+HTTP_REQUEST_SECONDS = REGISTRY.register(Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template.",
+    ("method", "route", "status"), HTTP_BUCKETS))
+STORE_OPERATION_SECONDS = REGISTRY.register(Histogram(
+    "store_operation_duration_seconds", "Leaderboard store operation latency.",
+    ("backend", "operation"), STORE_BUCKETS))
+STORE_ERRORS = REGISTRY.register(Counter(
+    "store_operation_errors_total", "Leaderboard store operations that failed.", ("backend", "operation")))
+DB_QUERY_SECONDS = REGISTRY.register(Histogram(
+    "db_query_duration_seconds", "SQLite statement latency by statement type.", ("statement",), DB_BUCKETS))
+UPLOAD_FILES = REGISTRY.register(Counter(
+    "upload_files_total", "Uploaded score files by parse result.", ("result",)))
+UPLOAD_ROWS = REGISTRY.register(Counter(
+    "upload_rows_total", "Uploaded score rows by parse result.", ("result",)))
+EVENT_LOOP_LAG_SECONDS = REGISTRY.register(Histogram(
+    "event_loop_lag_seconds", "Delay between a scheduled wake-up and the event loop running it.",
+    (), LOOP_LAG_BUCKETS))
+
+# 存储的 scan_iter 返回迭代器，不计时
+STORE_OPERATIONS = (
+    "get", "set", "mset", "delete", "incr", "zadd", "zrem", "zrange", "zrevrange", "zrank", "zrevrank",
+    "zscore", "zcard", "hset", "hdel", "hgetall", "publish",
+)
+
+
+def _timed_store_call(method: Callable, backend: str, operation: str) -> Callable:
+    labels = (backend, operation)
+
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return method(*args, **kwargs)
+        except Exception:
+            # 单个操作的异常在存储内部捕获（通过 on_error 计数），这里只会收到管道提交的异常
+            STORE_ERRORS.inc(labels)
+            raise
+        finally:
+            STORE_OPERATION_SECONDS.observe(labels, time.perf_counter() - started)
+
+    return wrapper
+
+
+def instrument_store(store: Any) -> Any:
+    """为存储客户端的操作和管道提交计时（替换实例上的方法，类本身不变）
+
+    管道按一次 "pipeline" 操作计数，其中的命令不再单独计数（本地管道直接调用未计时的内部实现）。
+    """
+    backend = "redis" if type(store).__name__ == "RemoteRedisClient" else "local"
+    store.on_error = lambda operation: STORE_ERRORS.inc((backend, operation))
+    for operation in STORE_OPERATIONS:
+        method = getattr(store, operation, None)
+        if method is not None:
+            setattr(store, operation, _timed_store_call(method, backend, operation))
+
+    create_pipeline = store.pipeline
+
+    @functools.wraps(create_pipeline)
+    def pipeline(*args, **kwargs):
+        pipe = create_pipeline(*args, **kwargs)
+        pipe.execute = _timed_store_call(pipe.execute, backend, "pipeline")
+        return pipe
+
+    store.pipeline = pipeline
+    return store
+
+
+def instrument_engine(engine: Any) -> None:
+    """通过 SQLAlchemy 的游标事件记录每条语句的耗时，按语句类型（SELECT、INSERT 等）区分"""
+    from sqlalchemy import event
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        context._metrics_started = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        started = getattr(context, "_metrics_started", None)
+        if started is None:
+            return
+        statement_type = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "OTHER"
+        DB_QUERY_SECONDS.observe((statement_type,), time.perf_counter() - started)
+
+
+class MetricsMiddleware:
+    """记录每个请求的耗时，按方法、路由模板和状态码分组
+
+    使用路由模板（如 /leaderboard/{subject}）而不是实际路径，避免标签数量无限增长；
+    Server-Sent Events 等长连接不计入直方图。
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        started = time.perf_counter()
+        status = 500
+        streaming = False
+
+        async def send_wrapper(message):
+            nonlocal status, streaming
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                for key, value in message.get("headers", ()):
+                    if key.lower() == b"content-type" and value.startswith(b"text/event-stream"):
+                        streaming = True
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            if not streaming:
+                HTTP_REQUEST_SECONDS.observe(
+                    (scope["method"], _route_label(scope), str(status)), time.perf_counter() - started
+                )
+
+
+def _route_label(scope: Dict[str, Any]) -> str:
+    route = scope.get("route")
+    if route is not None:
+        return route.path
+    # 挂载的静态文件目录没有路由对象，使用挂载路径
+    return scope.get("root_path") or "unmatched"
+
+
+class EventLoopMonitor:
+    """定期测量事件循环的延迟：休眠 interval 秒后实际被唤醒时多等待的时间"""
+
+    def __init__(self, interval: float = 0.5):
+        self.interval = interval
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, loop.time() - started - self.interval)
+            self.last_lag = lag
+            self.max_lag = max(self.max_lag, lag)
+            EVENT_LOOP_LAG_SECONDS.observe((), lag)
@@ -0,0 +1,277 @@
+from typing import Any, Dict, List, Optional, Tuple
+import glob
+import json
+import logging
+import os
+import re
+import threading
+import time
+
+import orjson
+
+from .storage import RedisClient, SortedSet
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FILE = "snapshot.json"
+LOG_FILE = "appendonly.{generation}.log"
+LOG_FILE_PATTERN = re.compile(r"appendonly\.(\d+)\.log$")
+SNAPSHOT_FORMAT = 2
+
+
+class AppendOnlyLog:
+    """写命令日志：每条命令一行 JSON，写入时只进入缓冲区，由 sync() 批量刷盘"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.records = 0
+        self._file = open(path, "ab")
+        self._lock = threading.Lock()
+        self._dirty = False
+
+    def append(self, record: List[Any]) -> None:
+        line = json.dumps(record, ensure_ascii=False, separators=(",", ":")).encode("utf-8") + b"\n"
+        with self._lock:
+            self._file.write(line)
+            self.records += 1
+            self._dirty = True
+
+    def sync(self) -> None:
+        with self._lock:
+            if not self._dirty or self._file.closed:
+                return
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._dirty = False
+
+    def close(self) -> None:
+        self.sync()
+        with self._lock:
+            self._file.close()
+
+
+def _fsync_directory(directory: str) -> None:
+    # 确保 rename 本身也已落盘（Windows 不支持打开目录，忽略）
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def dump_storage(storage: Dict[str, Any]) -> Dict[str, Any]:
+    """把存储转换为只包含基本类型的结构（字符串、哈希、有序集合分开保存）"""
+    strings, hashes, zsets = {}, {}, {}
+    for key, value in storage.items():
+        if isinstance(value, SortedSet):
+            zsets[key] = value.scores()
+        elif isinstance(value, dict):
+            hashes[key] = dict(value)
+        else:
+            strings[key] = value
+    return {"strings": strings, "hashes": hashes, "zsets": zsets}
+
+
+def load_storage(data: Dict[str, Any]) -> Dict[str, Any]:
+    storage: Dict[str, Any] = {}
+    storage.update(data["strings"])
+    storage.update(data["hashes"])
+    for key, scores in data["zsets"].items():
+        storage[key] = SortedSet.from_scores(scores)
+    return storage
+
+
+class LocalPersistence:
+    """本地存储的持久化：定期快照 + 追加写日志
+
+    - 写命令追加到 appendonly.{代}.log，每 fsync_interval 秒刷盘一次，
+      崩溃时最多丢失这段时间内的写入；管道中的命令作为一条记录写入，恢复时不会只应用一半。
+    - 每 snapshot_interval 秒（有新写入时）切换到下一代日志，把数据写入临时文件后
+      原子地替换 snapshot.json，然后删除快照已包含的旧日志。
+    - 启动时加载快照并按代重放之后的日志；末尾写了一半的记录会被截掉。
+      快照或日志无法读取时把这些文件改名保留，从空存储开始，由启动预热从 SQLite 重建排行榜。
+    - 快照使用 JSON（orjson），与 Python 版本无关，升级或重新打包后仍可加载。
+    """
+
+    def __init__(self, client: RedisClient, directory: str, snapshot_interval: float = 300,
+                 fsync_interval: float = 1.0):
+        self.client = client
+        self.directory = directory
+        self.snapshot_interval = snapshot_interval
+        self.fsync_interval = fsync_interval
+        self.generation = 0
+        self.log: Optional[AppendOnlyLog] = None
+        self.last_snapshot = time.monotonic()
+        self.last_load_seconds = 0.0
+        self._snapshot_lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def snapshot_path(self) -> str:
+        return os.path.join(self.directory, SNAPSHOT_FILE)
+
+    def _log_path(self, generation: int) -> str:
+        return os.path.join(self.directory, LOG_FILE.format(generation=generation))
+
+    def _log_generations(self) -> List[int]:
+        generations = []
+        for path in glob.glob(os.path.join(self.directory, "appendonly.*.log")):
+            match = LOG_FILE_PATTERN.search(os.path.basename(path))
+            if match:
+                generations.append(int(match.group(1)))
+        return sorted(generations)
+
+    def open(self) -> None:
+        """加载快照和日志，然后开始记录写命令并启动后台刷盘线程"""
+        os.makedirs(self.directory, exist_ok=True)
+        start = time.perf_counter()
+        try:
+            keys, replayed = self.load()
+        except Exception as e:
+            logger.error(f"Error loading local store from {self.directory}, starting empty: {str(e)}")
+            keys, replayed = self._set_aside(), 0
+        self.last_load_seconds = time.perf_counter() - start
+        logger.info("Loaded local store from %s: %d keys, %d log records replayed in %.2fs",
+                    self.directory, keys, replayed, self.last_load_seconds)
+
+        self.log = AppendOnlyLog(self._log_path(self.generation))
+        self.client._log = self.log
+        self.last_snapshot = time.monotonic()
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._background, name="local-store-persistence", daemon=True)
+        self._thread.start()
+
+    def load(self) -> Tuple[int, int]:
+        """恢复数据，返回 (键数, 重放的日志记录数)"""
+        generation = 0
+        if os.path.exists(self.snapshot_path):
+            with open(self.snapshot_path, "rb") as snapshot_file:
+                snapshot = orjson.loads(snapshot_file.read())
+            if snapshot.get("format") != SNAPSHOT_FORMAT:
+                raise ValueError(f"Unsupported snapshot format: {snapshot.get('format')}")
+            generation = snapshot["generation"]
+            with self.client._lock:
+                self.client.storage = load_storage(snapshot["data"])
+
+        replayed = 0
+        log_generations = [value for value in self._log_generations() if value >= generation]
+        for log_generation in log_generations:
+            replayed += self._replay(self._log_path(log_generation))
+        self.generation = max([generation] + log_generations)
+        return len(self.client.storage), replayed
+
+    def _set_aside(self) -> int:
+        """把无法加载的快照和日志改名为 *.corrupt-{时间} 保留，清空存储，返回键数 0
+
+        只重放快照之后的日志会得到不完整的科目，而启动预热会跳过已存在的科目，所以从空存储开始。
+        """
+        suffix = f".corrupt-{int(time.time())}"
+        paths = [self._log_path(generation) for generation in self._log_generations()]
+        if os.path.exists(self.snapshot_path):
+            paths.append(self.snapshot_path)
+        for path in paths:
+            os.replace(path, path + suffix)
+        with self.client._lock:
+            self.client.storage = {}
+        self.generation = 0
+        return 0
+
+    def _replay(self, path: str) -> int:
+        replayed = 0
+        good_offset = 0
+        with open(path, "rb") as log_file:
+            for line in log_file:
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break
+                self._apply(record)
+                good_offset += len(line)
+                replayed += 1
+        if good_offset < os.path.getsize(path):
+            # 上次退出时最后一条记录没有写完整，截掉后继续追加
+            logger.warning("Truncating incomplete record at offset %d of %s", good_offset, path)
+            with open(path, "r+b") as log_file:
+                log_file.truncate(good_offset)
+        return replayed
+
+    def _apply(self, record: List[Any]) -> None:
+        name, args = record[0], record[1:]
+        if name == "multi":
+            for command in args[0]:
+                self._apply(command)
+            return
+        if name in ("hset", "zadd", "mset"):
+            *head, mapping = args
+            if name == "mset":
+                self.client.mset(mapping)
+            else:
+                getattr(self.client, name)(*head, mapping=mapping)
+            return
+        getattr(self.client, name)(*args)
+
+    def snapshot(self) -> None:
+        """写入快照：在存储锁内切换日志并复制数据，序列化和写盘在锁外进行"""
+        with self._snapshot_lock:
+            start = time.perf_counter()
+            with self.client._lock:
+                new_generation = self.generation + 1
+                old_log = self.log
+                self.log = AppendOnlyLog(self._log_path(new_generation))
+                self.client._log = self.log
+                data = dump_storage(self.client.storage)
+            if old_log is not None:
+                old_log.close()
+
+            temp_path = self.snapshot_path + ".tmp"
+            with open(temp_path, "wb") as snapshot_file:
+                snapshot_file.write(orjson.dumps({"format": SNAPSHOT_FORMAT, "generation": new_generation, "data": data}))
+                snapshot_file.flush()
+                os.fsync(snapshot_file.fileno())
+            os.replace(temp_path, self.snapshot_path)
+            _fsync_directory(self.directory)
+
+            # 快照已经包含旧日志中的全部写入
+            for generation in self._log_generations():
+                if generation < new_generation:
+                    os.remove(self._log_path(generation))
+            self.generation = new_generation
+            self.last_snapshot = time.monotonic()
+            logger.info("Wrote local store snapshot (generation %d) in %.2fs",
+                        new_generation, time.perf_counter() - start)
+
+    def _background(self) -> None:
+        while not self._stopping.wait(self.fsync_interval):
+            try:
+                log = self.log
+                if log is not None:
+                    log.sync()
+                    due = time.monotonic() - self.last_snapshot >= self.snapshot_interval
+                    if due and log.records > 0:
+                        self.snapshot()
+            except Exception as e:
+                logger.error(f"Local store persistence error: {str(e)}")
+
+    def close(self) -> None:
+        """停止后台线程；有新写入时写一次快照，保证下次启动只需加载快照"""
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(timeout=10)
+            self._thread = None
+        if self.log is None:
+            return
+        try:
+            if self.log.records > 0:
+                self.snapshot()
+        finally:
+            self.client._log = None
+            self.log.close()
+            self.log = None
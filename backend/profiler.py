@@ -0,0 +1,90 @@
+from collections import Counter
+from typing import Dict, Optional
+import os
+import sys
+import threading
+import time
+
+# 线程空闲等待时所在的函数；默认不记录这些样本，只保留真正在执行的代码
+IDLE_FRAMES = {
+    ("selectors.py", "select"),
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("queue.py", "get"),
+    ("thread.py", "_worker"),
+}
+
+
+class ProfilerBusy(Exception):
+    """已经有一个采样正在进行"""
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    directory, filename = os.path.split(code.co_filename)
+    return f"{code.co_name} ({os.path.basename(directory)}/{filename})"
+
+
+def _is_idle(frame) -> bool:
+    code = frame.f_code
+    return (os.path.basename(code.co_filename), code.co_name) in IDLE_FRAMES
+
+
+class SamplingProfiler:
+    """采样分析器：每隔 interval 秒用 sys._current_frames() 读取所有线程的调用栈
+
+    不需要修改被分析的代码，也不需要 setprofile，开销只与采样频率和线程数有关；
+    结果为折叠栈格式（"线程;外层函数;...;内层函数 次数"），可直接交给 flamegraph.pl 或 speedscope。
+    同一时间只允许一个采样。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.samples = 0
+        self.seconds = 0.0
+
+    def profile(self, duration: float, interval: float = 0.01, include_idle: bool = False,
+                thread_names: Optional[Dict[int, str]] = None) -> Counter:
+        """在当前线程中采样 duration 秒；thread_names 可以为特定线程指定显示名称（如事件循环线程）"""
+        if not self._lock.acquire(blocking=False):
+            raise ProfilerBusy("a profile is already running")
+        try:
+            return self._sample(duration, interval, include_idle, thread_names or {})
+        finally:
+            self._lock.release()
+
+    def _sample(self, duration: float, interval: float, include_idle: bool,
+                thread_names: Dict[int, str]) -> Counter:
+        stacks: Counter = Counter()
+        own_ident = threading.get_ident()
+        started = time.perf_counter()
+        deadline = started + duration
+        samples = 0
+        while True:
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            names.update(thread_names)
+            for ident, frame in sys._current_frames().items():
+                if ident == own_ident or (not include_idle and _is_idle(frame)):
+                    continue
+                labels = []
+                while frame is not None:
+                    labels.append(_frame_label(frame))
+                    frame = frame.f_back
+                labels.append(names.get(ident, f"thread-{ident}").replace(";", ":"))
+                stacks[";".join(reversed(labels))] += 1
+            samples += 1
+            now = time.perf_counter()
+            if now >= deadline:
+                break
+            time.sleep(min(interval, deadline - now))
+        self.samples = samples
+        self.seconds = time.perf_counter() - started
+        return stacks
+
+
+def format_collapsed(stacks: Counter) -> str:
+    """折叠栈格式，每行一个调用栈，按次数从多到少排列"""
+    return "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+
+
+profiler = SamplingProfiler()
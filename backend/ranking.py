@@ -0,0 +1,30 @@
+from typing import Tuple
+
+# 排行榜排序键：平均分降序 → 评委人数降序 → 分差升序
+# 三个字段打包成一个小于 2**53 的整数，作为有序集合的分数可以被 float 精确表示，
+# 因此 zrevrange 的顺序即为最终排名，读取时无需再排序。
+AVG_SCALE = 10 ** 6          # 平均分保留 6 位小数
+RANGE_SCALE = 10 ** 4        # 分差保留 4 位小数
+JUDGE_BITS = 10
+RANGE_BITS = 17
+MAX_AVG = 10 * AVG_SCALE
+MAX_JUDGES = (1 << JUDGE_BITS) - 1
+MAX_RANGE = (1 << RANGE_BITS) - 1
+
+
+def encode_sort_key(average: float, judge_count: int, score_range: float) -> float:
+    """把 (平均分, 评委人数, 分差) 编码为有序集合分数"""
+    avg_q = min(max(int(round(average * AVG_SCALE)), 0), MAX_AVG)
+    judges_q = min(max(int(judge_count), 0), MAX_JUDGES)
+    range_q = min(max(int(round(score_range * RANGE_SCALE)), 0), MAX_RANGE)
+    packed = (avg_q << (JUDGE_BITS + RANGE_BITS)) | (judges_q << RANGE_BITS) | (MAX_RANGE - range_q)
+    return float(packed)
+
+
+def decode_sort_key(sort_key: float) -> Tuple[float, int, float]:
+    """从有序集合分数还原 (平均分, 评委人数, 分差)"""
+    packed = int(sort_key)
+    average = (packed >> (JUDGE_BITS + RANGE_BITS)) / AVG_SCALE
+    judge_count = (packed >> RANGE_BITS) & MAX_JUDGES
+    score_range = (MAX_RANGE - (packed & MAX_RANGE)) / RANGE_SCALE
+    return average, judge_count, score_range
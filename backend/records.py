@@ -0,0 +1,81 @@
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import logging
+import threading
+
+from sqlalchemy import delete, insert, select
+
+from .database import engine, Score, Student, User
+
+logger = logging.getLogger(__name__)
+
+# 同一进程中的导入依次写入，避免两个导入同时为同一个学生插入记录
+_write_lock = threading.Lock()
+# 每条 IN 查询的参数个数上限（低于 SQLite 的限制）
+IN_CHUNK_SIZE = 500
+
+
+def _split_member(member: str) -> Tuple[str, str]:
+    class_name, _, student_name = member.partition(":")
+    return class_name, student_name
+
+
+def _student_ids(connection: Any, members: Iterable[str], now: datetime) -> Dict[str, int]:
+    """返回 "班级:姓名" → 学生 ID，缺少的学生批量插入"""
+    students = Student.__table__
+    wanted = {_split_member(member) for member in members}
+    class_names = sorted({class_name for class_name, _ in wanted})
+
+    def load() -> Dict[Tuple[str, str], int]:
+        found: Dict[Tuple[str, str], int] = {}
+        for start in range(0, len(class_names), IN_CHUNK_SIZE):
+            rows = connection.execute(
+                select(students.c.id, students.c.class_name, students.c.name)
+                .where(students.c.class_name.in_(class_names[start:start + IN_CHUNK_SIZE]))
+                .order_by(students.c.id)
+            )
+            for student_id, class_name, name in rows:
+                found.setdefault((class_name, name), student_id)
+        return found
+
+    found = load()
+    missing = [key for key in wanted if key not in found]
+    if missing:
+        connection.execute(insert(students), [
+            {"class_name": class_name, "name": name, "created_at": now} for class_name, name in missing
+        ])
+        found = load()
+    return {f"{class_name}:{name}": found[(class_name, name)] for class_name, name in wanted}
+
+
+def save_sheets(subject: str, sheets: Dict[str, Dict[str, List[float]]], judge: Optional[str] = None,
+                retract: Iterable[str] = ()) -> int:
+    """把评委文件中的分数写入 SQLite，返回插入的行数
+
+    与排行榜的合并方式一致：同名文件先删除之前的记录再插入，retract 中的文件只删除。
+    所有语句在同一个事务中执行，分数用一次 executemany 批量插入。
+    """
+    scores = Score.__table__
+    sheet_ids = list(sheets) + [sheet_id for sheet_id in retract if sheet_id not in sheets]
+    if not sheet_ids:
+        return 0
+    now = datetime.utcnow()
+    with _write_lock, engine.begin() as connection:
+        user_id = None
+        if judge:
+            user_id = connection.execute(select(User.id).where(User.username == judge)).scalar()
+        for start in range(0, len(sheet_ids), IN_CHUNK_SIZE):
+            connection.execute(delete(scores).where(
+                scores.c.subject == subject, scores.c.sheet.in_(sheet_ids[start:start + IN_CHUNK_SIZE])
+            ))
+        student_ids = _student_ids(connection, {member for entries in sheets.values() for member in entries}, now)
+        rows = [
+            {"user_id": user_id, "student_id": student_ids[member], "subject": subject,
+             "sheet": sheet_id, "score": score, "timestamp": now}
+            for sheet_id, entries in sheets.items()
+            for member, values in entries.items()
+            for score in values
+        ]
+        if rows:
+            connection.execute(insert(scores), rows)
+    return len(rows)
@@ -0,0 +1,618 @@
+from typing import List, Dict, Any, Optional, Union, Iterator, Tuple, ContextManager, Callable
+from sortedcontainers import SortedList
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+def _report_error(store: Any, operation: str, error: Exception) -> None:
+    """记录存储操作中被捕获的异常；设置了 on_error 时（见 backend/metrics.py）同时计数"""
+    logger.error(f"Error in {operation} operation: {str(error)}")
+    if store.on_error is not None:
+        store.on_error(operation)
+
+
+class SortedSet:
+    """有序集合：按 (score, member) 排序，语义与 Redis ZSET 一致"""
+
+    def __init__(self):
+        self._scores: Dict[str, float] = {}
+        self._index = SortedList()
+
+    @classmethod
+    def from_scores(cls, scores: Dict[str, float]) -> "SortedSet":
+        """由 成员 → 分数 一次性构建（从快照恢复时使用），只排序一次"""
+        zset = cls()
+        zset._scores = {member: float(score) for member, score in scores.items()}
+        zset._index = SortedList((score, member) for member, score in zset._scores.items())
+        return zset
+
+    def scores(self) -> Dict[str, float]:
+        return dict(self._scores)
+
+    def __len__(self) -> int:
+        return len(self._scores)
+
+    def __contains__(self, member: str) -> bool:
+        return member in self._scores
+
+    def items(self) -> Iterator[Tuple[str, float]]:
+        for score, member in self._index:
+            yield member, score
+
+    def add(self, member: str, score: float) -> bool:
+        """插入或更新成员，返回是否为新成员 O(log n)"""
+        score = float(score)
+        old = self._scores.get(member)
+        if old is not None:
+            if old == score:
+                return False
+            self._index.remove((old, member))
+        self._scores[member] = score
+        self._index.add((score, member))
+        return old is None
+
+    def remove(self, member: str) -> bool:
+        score = self._scores.pop(member, None)
+        if score is None:
+            return False
+        self._index.remove((score, member))
+        return True
+
+    def score(self, member: str) -> Optional[float]:
+        return self._scores.get(member)
+
+    def rank(self, member: str) -> Optional[int]:
+        score = self._scores.get(member)
+        if score is None:
+            return None
+        return self._index.index((score, member))
+
+    def range(self, start: int, stop: int, reverse: bool = False) -> List[Tuple[str, float]]:
+        """按 Redis 规则（闭区间、支持负数下标）取出一段 O(log n + k)"""
+        length = len(self._index)
+        if start < 0:
+            start = max(length + start, 0)
+        if stop < 0:
+            stop = length + stop
+        stop = min(stop, length - 1)
+        if start > stop:
+            return []
+        if reverse:
+            window = self._index.islice(length - 1 - stop, length - start, reverse=True)
+        else:
+            window = self._index.islice(start, stop + 1)
+        return [(member, score) for score, member in window]
+
+
+# 写命令：写入追加日志，管道中的写命令作为一条 multi 记录写入
+WRITE_COMMANDS = frozenset(("set", "mset", "delete", "incr", "zadd", "zrem", "hset", "hdel"))
+
+
+class LocalPipeline:
+    """本地存储的批量命令：命令先缓存，execute() 时在同一把锁内一次性执行"""
+
+    def __init__(self, client: "RedisClient"):
+        self._client = client
+        self._commands: List[Tuple[str, tuple]] = []
+
+    def _queue(self, name: str, *args) -> "LocalPipeline":
+        self._commands.append((name, args))
+        return self
+
+    def set(self, key: str, value: str) -> "LocalPipeline":
+        return self._queue("set", key, value)
+
+    def mset(self, mapping: Dict[str, Any]) -> "LocalPipeline":
+        return self._queue("mset", mapping)
+
+    def delete(self, key: str) -> "LocalPipeline":
+        return self._queue("delete", key)
+
+    def incr(self, key: str) -> "LocalPipeline":
+        return self._queue("incr", key)
+
+    def zadd(self, key: str, mapping: Dict[str, float]) -> "LocalPipeline":
+        return self._queue("zadd", key, mapping)
+
+    def zrem(self, key: str, *members: str) -> "LocalPipeline":
+        return self._queue("zrem", key, *members)
+
+    def hset(self, key: str, mapping: Dict[str, Any]) -> "LocalPipeline":
+        return self._queue("hset", key, mapping)
+
+    def hdel(self, key: str, *fields: str) -> "LocalPipeline":
+        return self._queue("hdel", key, *fields)
+
+    def hgetall(self, key: str) -> "LocalPipeline":
+        return self._queue("hgetall", key)
+
+    def zcard(self, key: str) -> "LocalPipeline":
+        return self._queue("zcard", key)
+
+    def zscore(self, key: str, member: str) -> "LocalPipeline":
+        return self._queue("zscore", key, member)
+
+    def __len__(self) -> int:
+        return len(self._commands)
+
+    def execute(self) -> List[Any]:
+        commands, self._commands = self._commands, []
+        return self._client._execute(commands)
+
+
+class RedisClient:
+    """进程内的存储后端；合并、撤回和预热在线程池中写入，读写都在 _lock 内进行，
+    读取不会看到写了一半的数据（管道中的写入作为一个整体可见）
+
+    每个命令由 _<命令名> 实现（出错时抛出异常）；公开的方法与 RemoteRedisClient 一致，
+    出错时记录日志并返回默认值，管道的 execute() 则把错误抛给调用方。
+    """
+
+    def __init__(self):
+        self.storage = {}
+        self._lock = threading.RLock()
+        self._named_locks: Dict[str, threading.Lock] = {}
+        # 启用持久化时写命令会追加到日志（见 backend/persistence.py）
+        self.persistence = None
+        self._log = None
+        # 操作出错时调用 on_error(操作名)，用于错误计数
+        self.on_error: Optional[Callable[[str], None]] = None
+        logger.info("Using local storage mode")
+
+    def _write(self, name: str, *args: Any) -> Any:
+        """执行一条写命令：先写入日志再修改内存，日志写入失败时数据保持不变"""
+        with self._lock:
+            if self._log is not None:
+                self._log.append([name, *args])
+            return getattr(self, f"_{name}")(*args)
+
+    def _execute(self, commands: List[Tuple[str, tuple]]) -> List[Any]:
+        """在同一把锁内执行管道中的命令
+
+        写命令先作为一条 multi 记录写入日志，日志写入失败时不修改内存。与 Redis 事务一致，
+        某条命令出错时其余命令照常执行，全部执行完后抛出第一个错误。
+        """
+        with self._lock:
+            writes = [[name, *args] for name, args in commands if name in WRITE_COMMANDS]
+            if writes and self._log is not None:
+                self._log.append(["multi", writes])
+            results, error = [], None
+            for name, args in commands:
+                try:
+                    results.append(getattr(self, f"_{name}")(*args))
+                except Exception as e:
+                    error = error or e
+                    results.append(e)
+            if error is not None:
+                raise error
+            return results
+
+    def pipeline(self, transaction: bool = True) -> LocalPipeline:
+        """批量执行命令，execute() 时一次性应用全部命令，读取不会看到中间状态"""
+        return LocalPipeline(self)
+
+    def ensure_connection(self):
+        return True
+
+    def lock(self, name: str, timeout: float = 60) -> ContextManager:
+        """按名称互斥，用于读-改-写的合并操作（单进程内有效）"""
+        with self._lock:
+            return self._named_locks.setdefault(name, threading.Lock())
+
+    def _set(self, key: str, value: str) -> bool:
+        self.storage[key] = value
+        return True
+
+    def _mset(self, mapping: Dict[str, Any]) -> bool:
+        self.storage.update(mapping)
+        return True
+
+    def _delete(self, key: str) -> bool:
+        self.storage.pop(key, None)
+        return True
+
+    def _incr(self, key: str) -> int:
+        value = int(self.storage.get(key) or 0) + 1
+        self.storage[key] = str(value)
+        return value
+
+    def _zset(self, key: str, create: bool = False) -> Optional[SortedSet]:
+        zset = self.storage.get(key)
+        if zset is None and create:
+            zset = self.storage[key] = SortedSet()
+        return zset
+
+    def _zadd(self, key: str, mapping: Dict[str, float]) -> bool:
+        # 先转换全部分数，格式错误时不会只写入一部分成员
+        scores = {member: float(score) for member, score in mapping.items()}
+        zset = self._zset(key, create=True)
+        for member, score in scores.items():
+            zset.add(member, score)
+        return True
+
+    def _zrem(self, key: str, *members: str) -> int:
+        zset = self._zset(key)
+        if zset is None:
+            return 0
+        removed = sum(1 for member in members if zset.remove(member))
+        if not zset:
+            self.storage.pop(key, None)
+        return removed
+
+    def _zcard(self, key: str) -> int:
+        zset = self._zset(key)
+        return len(zset) if zset is not None else 0
+
+    def _zscore(self, key: str, member: str) -> Optional[float]:
+        zset = self._zset(key)
+        return zset.score(member) if zset is not None else None
+
+    def _hset(self, key: str, mapping: Dict[str, Any]) -> bool:
+        self.storage.setdefault(key, {}).update(mapping)
+        return True
+
+    def _hdel(self, key: str, *fields: str) -> int:
+        hash_value = self.storage.get(key)
+        if not hash_value:
+            return 0
+        removed = sum(1 for field in fields if hash_value.pop(field, None) is not None)
+        if not hash_value:
+            self.storage.pop(key, None)
+        return removed
+
+    def _hgetall(self, key: str) -> Dict[str, str]:
+        # 返回副本：调用方在锁外读取时不会看到之后的写入
+        return dict(self.storage.get(key, {}))
+
+    def set(self, key: str, value: str) -> bool:
+        try:
+            return self._write("set", key, value)
+        except Exception as e:
+            _report_error(self, "set", e)
+            return False
+
+    def mset(self, mapping: Dict[str, Any]) -> bool:
+        try:
+            return self._write("mset", mapping)
+        except Exception as e:
+            _report_error(self, "mset", e)
+            return False
+
+    def get(self, key: str) -> Optional[str]:
+        try:
+            with self._lock:
+                return self.storage.get(key)
+        except Exception as e:
+            _report_error(self, "get", e)
+            return None
+
+    def delete(self, key: str) -> bool:
+        try:
+            return self._write("delete", key)
+        except Exception as e:
+            _report_error(self, "delete", e)
+            return False
+
+    def incr(self, key: str) -> int:
+        try:
+            return self._write("incr", key)
+        except Exception as e:
+            _report_error(self, "incr", e)
+            return 0
+
+    def zadd(self, key: str, mapping: Dict[str, float]) -> bool:
+        try:
+            return self._write("zadd", key, mapping)
+        except Exception as e:
+            _report_error(self, "zadd", e)
+            return False
+
+    def zrem(self, key: str, *members: str) -> int:
+        try:
+            return self._write("zrem", key, *members)
+        except Exception as e:
+            _report_error(self, "zrem", e)
+            return 0
+
+    def zrange(self, key: str, start: int, stop: int, withscores: bool = False) -> Union[List[str], List[tuple]]:
+        try:
+            with self._lock:
+                zset = self._zset(key)
+                result = zset.range(start, stop) if zset is not None else []
+            if withscores:
+                return result
+            return [item[0] for item in result]
+        except Exception as e:
+            _report_error(self, "zrange", e)
+            return []
+
+    def zrevrange(self, key: str, start: int, stop: int, withscores: bool = False) -> Union[List[str], List[tuple]]:
+        try:
+            with self._lock:
+                zset = self._zset(key)
+                result = zset.range(start, stop, reverse=True) if zset is not None else []
+            if withscores:
+                return result
+            return [item[0] for item in result]
+        except Exception as e:
+            _report_error(self, "zrevrange", e)
+            return []
+
+    def zrank(self, key: str, member: str) -> Optional[int]:
+        try:
+            with self._lock:
+                zset = self._zset(key)
+                return zset.rank(member) if zset is not None else None
+        except Exception as e:
+            _report_error(self, "zrank", e)
+            return None
+
+    def zrevrank(self, key: str, member: str) -> Optional[int]:
+        try:
+            with self._lock:
+                zset = self._zset(key)
+                if zset is None:
+                    return None
+                rank = zset.rank(member)
+                return None if rank is None else len(zset) - 1 - rank
+        except Exception as e:
+            _report_error(self, "zrevrank", e)
+            return None
+
+    def zscore(self, key: str, member: str) -> Optional[float]:
+        try:
+            with self._lock:
+                return self._zscore(key, member)
+        except Exception as e:
+            _report_error(self, "zscore", e)
+            return None
+
+    def zcard(self, key: str) -> int:
+        try:
+            with self._lock:
+                return self._zcard(key)
+        except Exception as e:
+            _report_error(self, "zcard", e)
+            return 0
+
+    def hset(self, key: str, mapping: Dict[str, Any]) -> bool:
+        try:
+            return self._write("hset", key, mapping)
+        except Exception as e:
+            _report_error(self, "hset", e)
+            return False
+
+    def hdel(self, key: str, *fields: str) -> int:
+        try:
+            return self._write("hdel", key, *fields)
+        except Exception as e:
+            _report_error(self, "hdel", e)
+            return 0
+
+    def hgetall(self, key: str) -> Dict[str, str]:
+        try:
+            with self._lock:
+                return self._hgetall(key)
+        except Exception as e:
+            _report_error(self, "hgetall", e)
+            return {}
+
+    def scan_iter(self, pattern: str) -> List[str]:
+        try:
+            matching_keys = []
+            with self._lock:
+                keys = list(self.storage)
+            for key in keys:
+                if pattern.replace("*", "") in key:
+                    matching_keys.append(key)
+            return matching_keys
+        except Exception as e:
+            _report_error(self, "scan_iter", e)
+            return []
+
+
+class RemoteRedisClient:
+    """基于 redis-py 连接池的存储后端，方法与 RedisClient 保持一致
+
+    多个 uvicorn worker 共享同一个 Redis 时使用。测试时可以传入
+    fakeredis.FakeRedis(decode_responses=True) 作为 client。
+    """
+
+    def __init__(self, host: str = "localhost", port: int = 6379, password: Optional[str] = None,
+                 db: int = 0, max_connections: int = 50, client: Any = None):
+        if client is None:
+            import redis
+            pool = redis.ConnectionPool(
+                host=host,
+                port=port,
+                password=password,
+                db=db,
+                max_connections=max_connections,
+                decode_responses=True,
+                socket_connect_timeout=5,
+                socket_timeout=5,
+                health_check_interval=30,
+            )
+            client = redis.Redis(connection_pool=pool)
+            logger.info("Using Redis storage mode at %s:%s/%s", host, port, db)
+        self.client = client
+        # 操作出错时调用 on_error(操作名)，用于错误计数
+        self.on_error: Optional[Callable[[str], None]] = None
+
+    def pipeline(self, transaction: bool = True):
+        """返回 redis-py 管道，transaction=True 时以 MULTI/EXEC 一次往返原子提交"""
+        return self.client.pipeline(transaction=transaction)
+
+    def ensure_connection(self):
+        try:
+            return bool(self.client.ping())
+        except Exception as e:
+            logger.error(f"Redis connection error: {str(e)}")
+            return False
+
+    def lock(self, name: str, timeout: float = 60) -> ContextManager:
+        """Redis 分布式锁，所有 worker 之间互斥；timeout 秒后自动释放"""
+        return self.client.lock(name, timeout=timeout, blocking_timeout=timeout)
+
+    def set(self, key: str, value: str) -> bool:
+        try:
+            return bool(self.client.set(key, value))
+        except Exception as e:
+            _report_error(self, "set", e)
+            return False
+
+    def mset(self, mapping: Dict[str, Any]) -> bool:
+        try:
+            if mapping:
+                self.client.mset(mapping)
+            return True
+        except Exception as e:
+            _report_error(self, "mset", e)
+            return False
+
+    def get(self, key: str) -> Optional[str]:
+        try:
+            return self.client.get(key)
+        except Exception as e:
+            _report_error(self, "get", e)
+            return None
+
+    def delete(self, key: str) -> bool:
+        try:
+            self.client.delete(key)
+            return True
+        except Exception as e:
+            _report_error(self, "delete", e)
+            return False
+
+    def incr(self, key: str) -> int:
+        try:
+            return self.client.incr(key)
+        except Exception as e:
+            _report_error(self, "incr", e)
+            return 0
+
+    def zadd(self, key: str, mapping: Dict[str, float]) -> bool:
+        try:
+            if mapping:
+                self.client.zadd(key, mapping)
+            return True
+        except Exception as e:
+            _report_error(self, "zadd", e)
+            return False
+
+    def zrem(self, key: str, *members: str) -> int:
+        try:
+            return self.client.zrem(key, *members) if members else 0
+        except Exception as e:
+            _report_error(self, "zrem", e)
+            return 0
+
+    def zrange(self, key: str, start: int, stop: int, withscores: bool = False) -> Union[List[str], List[tuple]]:
+        try:
+            return self.client.zrange(key, start, stop, withscores=withscores)
+        except Exception as e:
+            _report_error(self, "zrange", e)
+            return []
+
+    def zrevrange(self, key: str, start: int, stop: int, withscores: bool = False) -> Union[List[str], List[tuple]]:
+        try:
+            return self.client.zrevrange(key, start, stop, withscores=withscores)
+        except Exception as e:
+            _report_error(self, "zrevrange", e)
+            return []
+
+    def zrank(self, key: str, member: str) -> Optional[int]:
+        try:
+            return self.client.zrank(key, member)
+        except Exception as e:
+            _report_error(self, "zrank", e)
+            return None
+
+    def zrevrank(self, key: str, member: str) -> Optional[int]:
+        try:
+            return self.client.zrevrank(key, member)
+        except Exception as e:
+            _report_error(self, "zrevrank", e)
+            return None
+
+    def zscore(self, key: str, member: str) -> Optional[float]:
+        try:
+            return self.client.zscore(key, member)
+        except Exception as e:
+            _report_error(self, "zscore", e)
+            return None
+
+    def zcard(self, key: str) -> int:
+        try:
+            return self.client.zcard(key)
+        except Exception as e:
+            _report_error(self, "zcard", e)
+            return 0
+
+    def hset(self, key: str, mapping: Dict[str, Any]) -> bool:
+        try:
+            if mapping:
+                self.client.hset(key, mapping=mapping)
+            return True
+        except Exception as e:
+            _report_error(self, "hset", e)
+            return False
+
+    def hdel(self, key: str, *fields: str) -> int:
+        try:
+            return self.client.hdel(key, *fields) if fields else 0
+        except Exception as e:
+            _report_error(self, "hdel", e)
+            return 0
+
+    def hgetall(self, key: str) -> Dict[str, str]:
+        try:
+            return self.client.hgetall(key)
+        except Exception as e:
+            _report_error(self, "hgetall", e)
+            return {}
+
+    def publish(self, channel: str, message: str) -> bool:
+        try:
+            self.client.publish(channel, message)
+            return True
+        except Exception as e:
+            _report_error(self, "publish", e)
+            return False
+
+    def pubsub(self):
+        """返回 redis-py 的发布/订阅对象（在独立线程中使用）"""
+        return self.client.pubsub()
+
+    def scan_iter(self, pattern: str) -> List[str]:
+        try:
+            return list(self.client.scan_iter(match=pattern, count=1000))
+        except Exception as e:
+            _report_error(self, "scan_iter", e)
+            return []
+
+
+def create_redis_client():
+    """根据配置创建排行榜存储后端；本地存储在设置了 LOCAL_STORE_DIR 时持久化到磁盘"""
+    from backend.config import (
+        STORAGE_BACKEND, REDIS_HOST, REDIS_PORT, REDIS_PASSWORD, REDIS_DB, REDIS_MAX_CONNECTIONS,
+        LOCAL_STORE_DIR, SNAPSHOT_INTERVAL, LOG_FSYNC_INTERVAL
+    )
+    if STORAGE_BACKEND == "redis":
+        return RemoteRedisClient(
+            host=REDIS_HOST,
+            port=REDIS_PORT,
+            password=REDIS_PASSWORD,
+            db=REDIS_DB,
+            max_connections=REDIS_MAX_CONNECTIONS,
+        )
+    client = RedisClient()
+    if LOCAL_STORE_DIR:
+        from backend.persistence import LocalPersistence
+        client.persistence = LocalPersistence(
+            client, LOCAL_STORE_DIR, snapshot_interval=SNAPSHOT_INTERVAL, fsync_interval=LOG_FSYNC_INTERVAL
+        )
+    return client
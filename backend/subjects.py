@@ -0,0 +1,46 @@
+from datetime import datetime
+from typing import Any, Dict, Optional
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+# 科目登记表：科目 → {"entries": 排行榜人数, "last_update": 最后写入时间}
+# 列出科目时只读这一个哈希，不需要扫描整个键空间
+SUBJECTS_KEY = "subjects"
+
+
+def record_subject(store: Any, subject: str, entries: int, last_update: Optional[str] = None) -> None:
+    """写入后更新科目的登记信息，store 也可以是管道；人数为 0 时移除该科目"""
+    if entries <= 0:
+        store.hdel(SUBJECTS_KEY, subject)
+        return
+    store.hset(SUBJECTS_KEY, mapping={subject: json.dumps({
+        "entries": entries,
+        "last_update": last_update or datetime.now().isoformat(),
+    }, ensure_ascii=False)})
+
+
+def list_subjects(store: Any) -> Dict[str, Dict[str, Any]]:
+    """返回所有科目及其登记信息，按科目名排序"""
+    registry = store.hgetall(SUBJECTS_KEY) or {}
+    return {subject: json.loads(registry[subject]) for subject in sorted(registry)}
+
+
+def rebuild_subject_registry(store: Any) -> int:
+    """登记表为空时由现有的排行榜键重建（用于升级前已有数据的 Redis），返回科目数"""
+    if store.hgetall(SUBJECTS_KEY):
+        return 0
+    count = 0
+    for key in store.scan_iter("leaderboard:*"):
+        if not key.startswith("leaderboard:"):
+            continue
+        subject = key[len("leaderboard:"):]
+        stats = store.hgetall(f"stats:{subject}") or {}
+        entries = store.zcard(key)
+        if entries > 0:
+            record_subject(store, subject, entries, stats.get("last_update"))
+            count += 1
+    if count:
+        logger.info("Rebuilt subject registry with %d subjects", count)
+    return count
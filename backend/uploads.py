@@ -0,0 +1,22 @@
+import os
+import tempfile
+
+# 上传文件写入磁盘时每次读取的字节数
+SPOOL_CHUNK_BYTES = 1024 * 1024
+
+
+async def spool_upload(upload) -> str:
+    """把上传的文件分块写入磁盘上的临时文件，返回文件路径（由调用方删除）"""
+    suffix = os.path.splitext(upload.filename or '')[1]
+    fd, path = tempfile.mkstemp(prefix="upload_", suffix=suffix)
+    try:
+        with os.fdopen(fd, "wb") as output:
+            while True:
+                chunk = await upload.read(SPOOL_CHUNK_BYTES)
+                if not chunk:
+                    break
+                output.write(chunk)
+    except Exception:
+        os.unlink(path)
+        raise
+    return path
@@ -0,0 +1,110 @@
+from typing import Any, Dict, List, Optional, Set
+import logging
+import threading
+import time
+
+from sqlalchemy import select
+
+from .database import engine, Score, Student, User
+from .merge import merge_sheets
+from .subjects import list_subjects
+
+logger = logging.getLogger(__name__)
+
+
+class WarmupState:
+    """启动预热的进度；ready 为 True 之前 /health 返回 503
+
+    预热出错时 finished 为 True、ready 保持 False，存储中只有部分科目，/health 一直返回 503（degraded）。
+    """
+
+    def __init__(self):
+        self.ready = False
+        self.finished = False
+        self.error: Optional[str] = None
+        self.rows_loaded = 0
+        self.subjects_loaded: List[str] = []
+        self.subjects_skipped = 0
+        self.started_at: Optional[float] = None
+        self.seconds = 0.0
+        self._lock = threading.Lock()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            seconds = self.seconds
+            if not self.finished and self.started_at is not None:
+                seconds = time.perf_counter() - self.started_at
+            return {
+                "ready": self.ready,
+                "finished": self.finished,
+                "rows_loaded": self.rows_loaded,
+                "subjects_loaded": len(self.subjects_loaded),
+                "subjects_skipped": self.subjects_skipped,
+                "seconds": round(seconds, 3),
+                "error": self.error,
+            }
+
+
+def _load_subject(store: Any, subject: str, sheets: Dict[str, Dict[str, Dict[str, List[float]]]]) -> None:
+    """把一个科目导入的评委文件按上传的评委分别增量合并到排行榜"""
+    for uploaded_by, uploader_sheets in sheets.items():
+        merge_sheets(store, subject, uploader_sheets, uploaded_by=uploaded_by or None)
+
+
+def warm_store(store: Any, state: WarmupState, chunk_size: int = 5000) -> WarmupState:
+    """从 SQLite 的 scores 表重建排行榜存储
+
+    按科目顺序分块读取评委文件中的分数，一个科目读完后批量写入，内存中只保留当前科目的数据。
+    通过 /submit_score 单独提交的分数（没有文件 ID）只保存在 SQLite 中，不会载入。
+    存储中已经存在的科目（本地快照或共享的 Redis 中已有数据）不会被覆盖。
+    """
+    with state._lock:
+        state.started_at = time.perf_counter()
+    existing: Set[str] = set(list_subjects(store))
+    scores, students, users = Score.__table__, Student.__table__, User.__table__
+    query = (
+        select(scores.c.subject, scores.c.sheet, students.c.class_name, students.c.name,
+               scores.c.score, users.c.username)
+        .select_from(scores.outerjoin(students, students.c.id == scores.c.student_id)
+                     .outerjoin(users, users.c.id == scores.c.user_id))
+        .where(scores.c.sheet.isnot(None))
+        .order_by(scores.c.subject, scores.c.id)
+    )
+    if existing:
+        query = query.where(scores.c.subject.notin_(sorted(existing)))
+
+    current: Optional[str] = None
+    sheets: Dict[str, Dict[str, Dict[str, List[float]]]] = {}
+
+    def flush():
+        if current is not None:
+            _load_subject(store, current, sheets)
+            with state._lock:
+                state.subjects_loaded.append(current)
+
+    try:
+        with engine.connect() as connection:
+            result = connection.execution_options(yield_per=chunk_size).execute(query)
+            for rows in result.partitions(chunk_size):
+                for subject, sheet, class_name, name, score, username in rows:
+                    if subject != current:
+                        flush()
+                        current, sheets = subject, {}
+                    if class_name is not None:
+                        sheet_scores = sheets.setdefault(username or "", {}).setdefault(sheet, {})
+                        sheet_scores.setdefault(f"{class_name}:{name}", []).append(score)
+                with state._lock:
+                    state.rows_loaded += len(rows)
+            flush()
+    except Exception as e:
+        logger.error(f"Error warming up leaderboard store from database: {str(e)}")
+        state.error = str(e)
+
+    with state._lock:
+        state.subjects_skipped = len(existing)
+        state.seconds = time.perf_counter() - state.started_at
+        state.finished = True
+        state.ready = state.error is None
+    logger.info("Warm-up loaded %d score rows for %d subjects in %.2fs (%d subjects already in the store)",
+                state.rows_loaded, len(state.subjects_loaded), state.seconds, state.subjects_skipped)
+    return state
@@ -0,0 +1,116 @@
+"""在进程内直接调用 ASGI 应用的最小客户端，基准测试不依赖 httpx 或真实的网络连接"""
+import asyncio
+import uuid
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlencode
+
+
+class Response:
+    def __init__(self, status: int, headers: List[Tuple[bytes, bytes]], body: bytes):
+        self.status = status
+        self.headers = {key.decode().lower(): value.decode() for key, value in headers}
+        self.raw_headers = headers
+        self.body = body
+
+    def cookies(self) -> Dict[str, str]:
+        result = {}
+        for key, value in self.raw_headers:
+            if key.lower() == b"set-cookie":
+                name, _, rest = value.decode().partition("=")
+                result[name] = rest.split(";", 1)[0]
+        return result
+
+
+class ASGIClient:
+    def __init__(self, app):
+        self.app = app
+        self.cookies: Dict[str, str] = {}
+
+    async def startup(self):
+        await self.app.router.startup()
+
+    async def shutdown(self):
+        await self.app.router.shutdown()
+
+    async def request(self, method: str, path: str, params: Optional[Dict[str, str]] = None,
+                      body: bytes = b"", headers: Optional[Dict[str, str]] = None) -> Response:
+        header_list = [(b"host", b"testserver")]
+        for key, value in (headers or {}).items():
+            header_list.append((key.lower().encode(), value.encode()))
+        if body:
+            header_list.append((b"content-length", str(len(body)).encode()))
+        if self.cookies:
+            cookie = "; ".join(f"{key}={value}" for key, value in self.cookies.items())
+            header_list.append((b"cookie", cookie.encode()))
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": method,
+            "scheme": "http",
+            "path": path,
+            "raw_path": path.encode(),
+            "root_path": "",
+            "query_string": urlencode(params or {}).encode(),
+            "headers": header_list,
+            "client": ("127.0.0.1", 50000),
+            "server": ("testserver", 80),
+        }
+        sent = False
+        status = 0
+        response_headers: List[Tuple[bytes, bytes]] = []
+        chunks: List[bytes] = []
+        disconnect = asyncio.Event()
+
+        async def receive():
+            nonlocal sent
+            if not sent:
+                sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            await disconnect.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            nonlocal status, response_headers
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                response_headers = list(message.get("headers", []))
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            disconnect.set()
+        response = Response(status, response_headers, b"".join(chunks))
+        self.cookies.update(response.cookies())
+        return response
+
+    async def get(self, path: str, **kwargs) -> Response:
+        return await self.request("GET", path, **kwargs)
+
+    async def post_form(self, path: str, fields: Dict[str, str],
+                        files: Optional[List[Tuple[str, str, bytes]]] = None) -> Response:
+        """提交表单；files 为 (字段名, 文件名, 内容) 列表时以 multipart 方式提交"""
+        if not files:
+            body = urlencode(fields).encode()
+            return await self.request("POST", path, body=body,
+                                      headers={"content-type": "application/x-www-form-urlencoded"})
+        boundary = uuid.uuid4().hex
+        parts = []
+        for name, value in fields.items():
+            parts.append(
+                f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode()
+            )
+        for name, filename, content in files:
+            parts.append(
+                f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"; filename="{filename}"\r\n'
+                f'Content-Type: application/octet-stream\r\n\r\n'.encode() + content + b"\r\n"
+            )
+        parts.append(f"--{boundary}--\r\n".encode())
+        return await self.request("POST", path, body=b"".join(parts),
+                                  headers={"content-type": f"multipart/form-data; boundary={boundary}"})
+
+    async def login(self, username: str, password: str) -> Response:
+        await self.post_form("/register", {"username": username, "password": password})
+        return await self.post_form("/login", {"username": username, "password": password})
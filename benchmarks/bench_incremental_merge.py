@@ -0,0 +1,87 @@
+"""增量合并单个评委文件与整体重新导入的耗时对比
+
+先把 --judges 个评委文件（每个覆盖全部 --students 名学生）导入本地存储，
+然后分别测量：替换一个只有 --sheet-rows 行的评委文件、撤回该文件，
+以及把所有评委文件重新合并一遍，并核对增量结果与整体重算完全一致（JSON 输出）。
+
+用法: python benchmarks/bench_incremental_merge.py [--students 50000] [--judges 5] [--sheet-rows 200]
+"""
+import argparse
+import math
+import random
+import sys
+import time
+
+from common import ROOT, print_report  # noqa: E402
+
+sys.path.insert(0, ROOT)
+from backend.merge import merge_sheets, retract_sheet  # noqa: E402
+from backend.storage import RedisClient  # noqa: E402
+
+
+def make_sheet(rnd, students, rows=None):
+    chosen = students if rows is None else rnd.sample(students, rows)
+    return {student: [round(rnd.uniform(0, 10), 2)] for student in chosen}
+
+
+def timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    func(*args, **kwargs)
+    return round((time.perf_counter() - start) * 1000, 2)
+
+
+def check_against_full_recompute(store, subject, sheets):
+    scores = {}
+    for sheet in sheets.values():
+        for student, values in sheet.items():
+            scores.setdefault(student, []).extend(values)
+    board = dict(store.zrange(f"leaderboard:{subject}", 0, -1, withscores=True))
+    if set(board) != set(scores):
+        return False
+    return all(
+        float(store.hgetall(f"{subject}:{student}:details")["avg_score"]) == math.fsum(values) / len(values)
+        for student, values in scores.items()
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--students", type=int, default=50000)
+    parser.add_argument("--judges", type=int, default=5)
+    parser.add_argument("--sheet-rows", type=int, default=200)
+    args = parser.parse_args()
+
+    rnd = random.Random(0)
+    students = [f"{i % 30 + 1}班:学生{i}" for i in range(args.students)]
+    sheets = {f"judge{j}.xlsx": make_sheet(rnd, students) for j in range(args.judges)}
+    store = RedisClient()
+    initial_ms = timed(merge_sheets, store, "bench", sheets)
+
+    small = make_sheet(rnd, students, args.sheet_rows)
+    sheets["late_judge.xlsx"] = small
+    add_ms = timed(merge_sheets, store, "bench", {"late_judge.xlsx": small})
+    replacement = make_sheet(rnd, students, args.sheet_rows)
+    sheets["late_judge.xlsx"] = replacement
+    replace_ms = timed(merge_sheets, store, "bench", {"late_judge.xlsx": replacement})
+    incremental_ok = check_against_full_recompute(store, "bench", sheets)
+
+    del sheets["late_judge.xlsx"]
+    retract_ms = timed(retract_sheet, store, "bench", "late_judge.xlsx")
+    retract_ok = check_against_full_recompute(store, "bench", sheets)
+
+    full_ms = timed(merge_sheets, RedisClient(), "bench", sheets)
+    print_report({
+        "students": args.students,
+        "judges": args.judges,
+        "sheet_rows": args.sheet_rows,
+        "initial_import_ms": initial_ms,
+        "add_sheet_ms": add_ms,
+        "replace_sheet_ms": replace_ms,
+        "retract_sheet_ms": retract_ms,
+        "full_recompute_ms": full_ms,
+        "matches_full_recompute": incremental_ok and retract_ok,
+    })
+
+
+if __name__ == "__main__":
+    main()
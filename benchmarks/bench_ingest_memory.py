@@ -0,0 +1,66 @@
+"""评分文件解析的内存基准
+
+分别生成 1k/10k/100k 行的 Excel 表格，在独立的子进程中用流式解析
+（backend.ingest.parse_score_file）和旧的完整加载方式
+（openpyxl.load_workbook 全量模式 + 读入全部字节）读取，输出峰值 RSS（JSON）。
+
+用法: python benchmarks/bench_ingest_memory.py [--rows 1000 10000 100000]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from common import make_workbook, peak_rss_mb, print_report, print_worker_result, run_worker, worker_environment  # noqa: E402
+
+
+def measure(mode: str, path: str):
+    """子进程：导入依赖后记录基线 RSS，再解析文件并记录峰值 RSS"""
+    import io
+    import openpyxl
+    from backend.ingest import parse_score_file
+    baseline = peak_rss_mb()
+    started = time.perf_counter()
+    if mode == "streaming":
+        frame, errors = parse_score_file(os.path.basename(path), path)
+        rows = len(frame)
+    else:
+        with open(path, "rb") as f:
+            contents = f.read()
+        workbook = openpyxl.load_workbook(io.BytesIO(contents), data_only=True)
+        rows = sum(1 for _ in workbook.active.iter_rows(min_row=2))
+    print_worker_result({
+        "rows": rows,
+        "seconds": round(time.perf_counter() - started, 3),
+        "baseline_rss_mb": baseline,
+        "peak_rss_mb": peak_rss_mb(),
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--worker", nargs=2, metavar=("MODE", "PATH"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        worker_environment()
+        measure(*args.worker)
+        return
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in args.rows:
+            path = os.path.join(tmp, f"scores_{rows}.xlsx")
+            with open(path, "wb") as workbook_file:
+                workbook_file.write(make_workbook(rows))
+            for mode in ("streaming", "full_load"):
+                result, _ = run_worker(__file__, [mode, path])
+                result.update({"sheet_rows": rows, "mode": mode, "file_bytes": os.path.getsize(path)})
+                result["parse_rss_mb"] = round(result["peak_rss_mb"] - result["baseline_rss_mb"], 1)
+                results.append(result)
+    print_report({"benchmark": "ingest_memory", "results": results})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""登录高峰期间排行榜读取的延迟
+
+先注册 --judges 个评委，然后让他们同时登录，期间每隔 --interval 秒读取一次全屏排行榜，
+分别测量 bcrypt 直接在事件循环中执行（inline）和放入密码线程池（pool）两种情况下的读取延迟（JSON 输出）。
+
+用法: python benchmarks/bench_login_burst.py [--judges 50] [--interval 0.01]
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from asgi_client import ASGIClient  # noqa: E402
+from common import percentile, print_report, print_worker_result, run_worker, worker_environment  # noqa: E402
+
+
+async def measure(judges: int, interval: float, inline: bool):
+    import backend.main as main_module
+    from backend.auth import verify_password
+    from backend.ranking import encode_sort_key
+
+    if inline:
+        # 还原为改动前的行为：在事件循环中直接计算 bcrypt
+        async def verify_inline(plain_password, hashed_password):
+            return verify_password(plain_password, hashed_password)
+        main_module.verify_password_async = verify_inline
+
+    reader = ASGIClient(main_module.app)
+    await reader.startup()
+    main_module.redis_client.zadd("leaderboard:display", {
+        f"{i % 30 + 1}班:学生{i}": encode_sort_key((i * 37 % 101) / 10, 3, 1.0) for i in range(1000)
+    })
+    for j in range(judges):
+        await ASGIClient(main_module.app).post_form("/register", {"username": f"judge{j}", "password": "pw"})
+
+    latencies = []
+    burst_done = asyncio.Event()
+
+    async def poll():
+        while not burst_done.is_set():
+            started = time.perf_counter()
+            response = await reader.get("/leaderboard/display/fullscreen")
+            assert response.status == 200, response.status
+            latencies.append(time.perf_counter() - started)
+            await asyncio.sleep(interval)
+
+    async def burst():
+        started = time.perf_counter()
+        try:
+            responses = await asyncio.gather(*[
+                ASGIClient(main_module.app).post_form("/login", {"username": f"judge{j}", "password": "pw"})
+                for j in range(judges)
+            ])
+            return [response.status for response in responses], time.perf_counter() - started
+        finally:
+            burst_done.set()
+
+    poller = asyncio.create_task(poll())
+    statuses, burst_seconds = await burst()
+    await poller
+    await reader.shutdown()
+
+    print_worker_result({
+        "logins_ok": statuses.count(303),
+        "burst_seconds": round(burst_seconds, 3),
+        "reads_during_burst": len(latencies),
+        "read_p50_ms": round(statistics.median(latencies) * 1000, 2),
+        "read_p95_ms": round(percentile(latencies, 0.95) * 1000, 2),
+        "read_max_ms": round(max(latencies) * 1000, 2),
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--judges", type=int, default=50)
+    parser.add_argument("--interval", type=float, default=0.01)
+    parser.add_argument("--worker", choices=("inline", "pool"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        worker_environment()
+        asyncio.run(measure(args.judges, args.interval, args.worker == "inline"))
+        return
+
+    results = []
+    for mode in ("inline", "pool"):
+        result, _ = run_worker(__file__, [mode, "--judges", str(args.judges), "--interval", str(args.interval)])
+        result.update({"mode": mode, "judges": args.judges})
+        results.append(result)
+    print_report({"benchmark": "login_burst", "results": results})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""本地存储持久化：快照写入、快照加载和日志重放的耗时
+
+构造约 --keys 个键（每个学生一个详细信息哈希和一个评委分数哈希，外加每个科目的有序集合），
+写入快照后在新的存储实例中加载，再测量 --log-records 条写命令日志的重放速度（JSON 输出）。
+
+用法: python benchmarks/bench_persistence_load.py [--keys 1000000] [--subjects 20] [--log-records 100000]
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from common import ROOT, print_report  # noqa: E402
+
+sys.path.insert(0, ROOT)
+from backend.persistence import LocalPersistence  # noqa: E402
+from backend.ranking import encode_sort_key  # noqa: E402
+from backend.storage import RedisClient, SortedSet  # noqa: E402
+
+
+def build_store(keys: int, subjects: int) -> RedisClient:
+    client = RedisClient()
+    students_per_subject = max(1, keys // (subjects * 2))
+    for subject_index in range(subjects):
+        subject = f"subject{subject_index}"
+        scores = {}
+        for i in range(students_per_subject):
+            student = f"{i % 30 + 1}班:学生{i}"
+            average = (i * 37 % 101) / 10
+            client.storage[f"{subject}:{student}:judges"] = {
+                f"judge{j}.xlsx": str(average) for j in range(3)
+            }
+            client.storage[f"{subject}:{student}:details"] = {
+                "avg_score": str(average), "min_score": str(average), "max_score": str(average),
+                "score_range": "0.0", "judge_count": "3", "score_sum": str(average * 3),
+            }
+            scores[student] = encode_sort_key(average, 3, 0)
+        client.storage[f"leaderboard:{subject}"] = SortedSet.from_scores(scores)
+    return client
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--keys", type=int, default=1000000)
+    parser.add_argument("--subjects", type=int, default=20)
+    parser.add_argument("--log-records", type=int, default=100000)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix="store_bench_")
+    try:
+        client = build_store(args.keys, args.subjects)
+        persistence = LocalPersistence(client, directory, snapshot_interval=3600)
+        persistence.open()
+        start = time.perf_counter()
+        persistence.snapshot()
+        snapshot_seconds = time.perf_counter() - start
+
+        # 写命令日志：模拟单个学生的增量更新
+        start = time.perf_counter()
+        for i in range(args.log_records):
+            pipe = client.pipeline()
+            pipe.hset(f"subject0:1班:新学生{i}:details", mapping={"avg_score": "9.5", "judge_count": "1"})
+            pipe.zadd("leaderboard:subject0", {f"1班:新学生{i}": encode_sort_key(9.5, 1, 0)})
+            pipe.execute()
+        persistence.log.sync()
+        log_write_seconds = time.perf_counter() - start
+        key_count = len(client.storage)
+
+        # 模拟进程崩溃后重启：不调用 close()，直接用新的实例加载
+        restored = RedisClient()
+        restored_persistence = LocalPersistence(restored, directory, snapshot_interval=3600)
+        start = time.perf_counter()
+        _, replayed = restored_persistence.load()
+        load_seconds = time.perf_counter() - start
+        persistence._stopping.set()
+
+        print_report({
+            "keys": key_count,
+            "snapshot_bytes": os.path.getsize(persistence.snapshot_path),
+            "snapshot_write_seconds": round(snapshot_seconds, 2),
+            "log_records": args.log_records,
+            "log_write_seconds": round(log_write_seconds, 2),
+            "load_seconds": round(load_seconds, 2),
+            "log_records_replayed": replayed,
+            "restored_keys_match": len(restored.storage) == key_count,
+        })
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
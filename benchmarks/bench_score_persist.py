@@ -0,0 +1,81 @@
+"""导入成绩写入 SQLite 的耗时，以及写入期间其他连接的读取延迟
+
+生成 --files 个评委文件、共 --rows 行分数，用 save_sheets 在一个事务中写入，
+同时另一个线程不断查询 scores 表（JSON 输出）。第二轮以相同文件名重新写入，测量替换的耗时。
+
+用法: python benchmarks/bench_score_persist.py [--rows 100000] [--files 4] [--students 20000]
+"""
+import argparse
+import statistics
+import tempfile
+import threading
+import time
+
+from common import prepare_environment, print_report  # noqa: E402
+
+
+def make_sheets(rows: int, files: int, students: int):
+    sheets = {}
+    per_file = rows // files
+    for j in range(files):
+        entries = {}
+        for i in range(per_file):
+            student = (i * 7 + j) % students
+            entries.setdefault(f"{student % 30 + 1}班:学生{student}", []).append(round((i * 37 % 101) / 10, 1))
+        sheets[f"judge{j}.xlsx"] = entries
+    return sheets
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--files", type=int, default=4)
+    parser.add_argument("--students", type=int, default=20000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        prepare_environment(tmp)
+        from sqlalchemy import text
+        from backend.database import engine, init_db
+        from backend.records import save_sheets
+
+        init_db()
+
+        sheets = make_sheets(args.rows, args.files, args.students)
+        results = []
+        for round_name in ("insert", "replace"):
+            latencies = []
+            writing = threading.Event()
+            writing.set()
+
+            def read():
+                with engine.connect() as connection:
+                    while writing.is_set():
+                        started = time.perf_counter()
+                        connection.execute(text("SELECT COUNT(*) FROM scores WHERE subject = 'bench'")).scalar()
+                        connection.rollback()
+                        latencies.append(time.perf_counter() - started)
+                        time.sleep(0.005)
+
+            reader = threading.Thread(target=read)
+            reader.start()
+            started = time.perf_counter()
+            saved = save_sheets("bench", sheets)
+            seconds = time.perf_counter() - started
+            writing.clear()
+            reader.join()
+            results.append({
+                "round": round_name,
+                "rows_saved": saved,
+                "save_seconds": round(seconds, 3),
+                "rows_per_second": round(saved / seconds),
+                "reads_during_save": len(latencies),
+                "read_p50_ms": round(statistics.median(latencies) * 1000, 2),
+                "read_max_ms": round(max(latencies) * 1000, 2),
+            })
+        engine.dispose()
+    print_report({"benchmark": "score_persist", "results": results})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""冷启动时间：导入 backend.main 的耗时（-X importtime）和启动到 /health 返回 200 的时间
+
+每轮启动一个新进程和空的数据库，输出导入时间、启动时间的中位数，
+导入后是否已经加载了 pandas / numpy / openpyxl，以及 backend.main 直接导入的模块中最慢的几个（JSON 输出）。
+
+用法: python benchmarks/bench_startup.py [--runs 5] [--top 15]
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+
+from asgi_client import ASGIClient  # noqa: E402
+from common import print_report, print_worker_result, run_worker, worker_environment  # noqa: E402
+
+HEAVY_MODULES = ("pandas", "numpy", "openpyxl")
+
+
+async def measure():
+    started = time.perf_counter()
+    import backend.main as main_module
+    import_seconds = time.perf_counter() - started
+    heavy = [name for name in HEAVY_MODULES if name in sys.modules]
+
+    client = ASGIClient(main_module.app)
+    started = time.perf_counter()
+    await client.startup()
+    while (await client.get("/health")).status != 200:
+        await asyncio.sleep(0.005)
+    ready_seconds = time.perf_counter() - started
+    await client.shutdown()
+    print_worker_result({
+        "import_ms": round(import_seconds * 1000, 1),
+        "startup_to_ready_ms": round(ready_seconds * 1000, 1),
+        "heavy_modules_loaded": heavy,
+    })
+
+
+def parse_importtime(stderr: str, top: int):
+    """返回 backend.main 的累计导入时间和它直接导入的模块（按累计时间排序）"""
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|", 2)
+        if not cumulative.strip().isdigit():
+            continue
+        depth = (len(name) - len(name.lstrip(" ")) - 1) // 2
+        entries.append((depth, name.strip(), int(cumulative)))
+
+    # -X importtime 先输出子模块，再输出父模块；backend.main 之前、上一个顶层模块之后的第一层模块都是它的直接导入
+    total_us, children = None, []
+    for index, (depth, name, cumulative) in enumerate(entries):
+        if depth == 0 and name == "backend.main":
+            total_us = cumulative
+            for child_depth, child_name, child_cumulative in reversed(entries[:index]):
+                if child_depth == 0:
+                    break
+                if child_depth == 1:
+                    children.append((child_name, child_cumulative))
+    children.sort(key=lambda item: item[1], reverse=True)
+    return total_us, [{"module": name, "cumulative_ms": round(us / 1000, 1)} for name, us in children[:top]]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        worker_environment()
+        asyncio.run(measure())
+        return
+
+    runs = []
+    for _ in range(args.runs):
+        started = time.perf_counter()
+        run, stderr = run_worker(__file__, [], python_args=["-X", "importtime"])
+        run["process_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        run["importtime_ms"], run["slowest_imports"] = parse_importtime(stderr, args.top)
+        if run["importtime_ms"] is not None:
+            run["importtime_ms"] = round(run["importtime_ms"] / 1000, 1)
+        runs.append(run)
+
+    report = {
+        "benchmark": "startup",
+        "runs": len(runs),
+        # -X importtime 本身有开销，import_ms 和 process_ms 中包含这部分
+        "median_import_ms": statistics.median(run["import_ms"] for run in runs),
+        "median_startup_to_ready_ms": statistics.median(run["startup_to_ready_ms"] for run in runs),
+        "median_process_ms": statistics.median(run["process_ms"] for run in runs),
+        "heavy_modules_loaded": runs[-1]["heavy_modules_loaded"],
+        "slowest_imports": runs[-1]["slowest_imports"],
+    }
+    print_report(report)
+
+
+if __name__ == "__main__":
+    main()
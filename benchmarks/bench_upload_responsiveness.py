@@ -0,0 +1,99 @@
+"""大文件导入期间排行榜读取的响应时间
+
+在独立子进程中分别以 PARSE_WORKERS=0（线程中解析）和进程池模式启动应用，
+上传若干个大 Excel 文件的同时每隔 --interval 秒读取一次排行榜页面，
+输出导入耗时、导入期间读取延迟的 p50/p95/max，以及事件循环延迟（两次读取之间的休眠
+比 --interval 多出的时间；事件循环被合并等同步工作阻塞时，读取请求本身可能恰好不在进行中）（JSON）。
+
+用法: python benchmarks/bench_upload_responsiveness.py [--rows 50000] [--files 4] [--workers 4]
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from asgi_client import ASGIClient  # noqa: E402
+from common import make_workbook, percentile, print_report, print_worker_result, run_worker, worker_environment  # noqa: E402
+
+
+async def measure(rows: int, files: int, interval: float):
+    from backend.main import app, redis_client
+    from backend.ranking import encode_sort_key
+
+    client = ASGIClient(app)
+    await client.startup()
+    await client.login("bench_judge", "bench_password")
+
+    # 准备一个用于读取的排行榜
+    redis_client.zadd("leaderboard:display", {
+        f"{i % 30 + 1}班:学生{i}": encode_sort_key((i * 37 % 101) / 10, 3, 1.0) for i in range(1000)
+    })
+    uploads = [("files", f"judge{j}.xlsx", make_workbook(rows, j)) for j in range(files)]
+
+    latencies, lags = [], []
+    upload_done = asyncio.Event()
+
+    async def poll():
+        while not upload_done.is_set():
+            started = time.perf_counter()
+            response = await client.get("/leaderboard/display")
+            assert response.status == 200, response.status
+            latencies.append(time.perf_counter() - started)
+            slept = time.perf_counter()
+            await asyncio.sleep(interval)
+            lags.append(max(0.0, time.perf_counter() - slept - interval))
+
+    async def upload():
+        started = time.perf_counter()
+        try:
+            response = await client.post_form("/upload_scores", {"subject": "bench"}, files=uploads)
+            return response.status, time.perf_counter() - started
+        finally:
+            upload_done.set()
+
+    poller = asyncio.create_task(poll())
+    status, upload_seconds = await upload()
+    await poller
+    await client.shutdown()
+
+    print_worker_result({
+        "upload_status": status,
+        "upload_seconds": round(upload_seconds, 3),
+        "reads_during_upload": len(latencies),
+        "read_p50_ms": round(statistics.median(latencies) * 1000, 2),
+        "read_p95_ms": round(percentile(latencies, 0.95) * 1000, 2),
+        "read_max_ms": round(max(latencies) * 1000, 2),
+        "loop_lag_p95_ms": round(percentile(lags, 0.95) * 1000, 2) if lags else None,
+        "loop_lag_max_ms": round(max(lags) * 1000, 2) if lags else None,
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=50000)
+    parser.add_argument("--files", type=int, default=4)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--interval", type=float, default=0.02)
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        worker_environment()
+        asyncio.run(measure(args.rows, args.files, args.interval))
+        return
+
+    results = []
+    for workers in (0, args.workers):
+        result, _ = run_worker(__file__, ["--rows", str(args.rows), "--files", str(args.files),
+                                          "--interval", str(args.interval)],
+                               env={"PARSE_WORKERS": str(workers)})
+        result.update({"parse_workers": workers, "rows_per_file": args.rows, "files": args.files})
+        results.append(result)
+    print_report({"benchmark": "upload_responsiveness", "results": results})
+
+
+if __name__ == "__main__":
+    main()
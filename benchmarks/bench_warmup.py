@@ -0,0 +1,71 @@
+"""启动预热：从 SQLite 重建排行榜存储所需的时间与 scores 表大小的关系
+
+对每个 --sizes 中的行数，用 save_sheets 写入 --subjects 个科目的评委文件，
+然后在空的本地存储上运行 warm_store，输出就绪时间和每秒加载的行数（JSON 输出）。
+
+用法: python benchmarks/bench_warmup.py [--sizes 10000,100000,500000] [--subjects 5] [--chunk-size 5000]
+"""
+import argparse
+import time
+
+from common import print_report, print_worker_result, run_worker, worker_environment  # noqa: E402
+
+JUDGES_PER_SUBJECT = 4
+
+
+def measure(rows: int, subjects: int, chunk_size: int):
+    from backend.database import init_db
+    from backend.ranking import decode_sort_key
+    from backend.records import save_sheets
+    from backend.storage import RedisClient
+    from backend.warmup import WarmupState, warm_store
+
+    init_db()
+    per_sheet = max(1, rows // (subjects * JUDGES_PER_SUBJECT))
+    students = max(1, per_sheet // 2)
+    for subject_index in range(subjects):
+        for judge in range(JUDGES_PER_SUBJECT):
+            entries = {}
+            for i in range(per_sheet):
+                student = (i * 7 + judge) % students
+                entries.setdefault(f"{student % 30 + 1}班:学生{student}", []).append(round((i * 37 % 101) / 10, 1))
+            save_sheets(f"subject{subject_index}", {f"judge{judge}.xlsx": entries})
+
+    store = RedisClient()
+    start = time.perf_counter()
+    state = warm_store(store, WarmupState(), chunk_size)
+    seconds = time.perf_counter() - start
+    top = store.zrevrange("leaderboard:subject0", 0, 0, withscores=True)
+    print_worker_result({
+        "rows": state.rows_loaded,
+        "subjects": len(state.subjects_loaded),
+        "students": sum(store.zcard(f"leaderboard:subject{i}") for i in range(subjects)),
+        "ready_seconds": round(seconds, 3),
+        "rows_per_second": round(state.rows_loaded / seconds) if seconds else None,
+        "top_average": decode_sort_key(top[0][1])[0] if top else None,
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="10000,100000,500000")
+    parser.add_argument("--subjects", type=int, default=5)
+    parser.add_argument("--chunk-size", type=int, default=5000)
+    parser.add_argument("--worker", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        worker_environment()
+        measure(args.worker, args.subjects, args.chunk_size)
+        return
+
+    results = []
+    for rows in (int(size) for size in args.sizes.split(",")):
+        result, _ = run_worker(__file__, [str(rows), "--subjects", str(args.subjects),
+                                          "--chunk-size", str(args.chunk_size)])
+        results.append(result)
+    print_report({"benchmark": "warmup", "chunk_size": args.chunk_size, "results": results})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""基准测试共用的工具：统计、峰值 RSS、合成评分文件，以及在独立子进程中运行一轮测量"""
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def prepare_environment(workdir: str):
+    """在导入 backend 之前调用：把数据库放到临时目录，避免改动仓库中的 leaderboard.db"""
+    os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(workdir, 'bench.db')}")
+    os.environ.setdefault("JWT_SECRET", "benchmark-secret")
+    if ROOT not in sys.path:
+        sys.path.insert(0, ROOT)
+
+
+def worker_environment():
+    """子进程中调用：使用 run_worker 创建的临时目录"""
+    prepare_environment(os.environ["BENCH_WORKDIR"])
+
+
+def run_worker(script: str, worker_args: Sequence[str], env: Optional[Dict[str, str]] = None,
+               python_args: Sequence[str] = ()) -> Tuple[Dict[str, Any], str]:
+    """在新的子进程中以 --worker 运行 script，返回 (最后一行输出的 JSON, 标准错误输出)
+
+    每次使用新的进程和临时目录（BENCH_WORKDIR），数据库、峰值 RSS 和已导入的模块互不影响；
+    默认使用不持久化的本地存储，env 中的值覆盖这些设置。
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        environment = dict(os.environ, BENCH_WORKDIR=tmp, STORAGE_BACKEND="local", LOCAL_STORE_DIR="")
+        environment.update(env or {})
+        completed = subprocess.run(
+            [sys.executable, *python_args, os.path.abspath(script), "--worker", *worker_args],
+            check=True, capture_output=True, text=True, cwd=ROOT, env=environment,
+        )
+    return json.loads(completed.stdout.strip().splitlines()[-1]), completed.stderr
+
+
+def print_worker_result(result: Dict[str, Any]):
+    """子进程把结果输出为一行 JSON，由 run_worker 读取"""
+    print(json.dumps(result))
+
+
+def print_report(report: Dict[str, Any]):
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round((len(ordered) - 1) * fraction)))]
+
+
+def peak_rss_mb() -> Optional[float]:
+    if resource is None:
+        return None
+    # Linux 上 ru_maxrss 的单位是 KB，macOS 上是字节
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def make_workbook(rows: int, judge: int = 0) -> bytes:
+    """生成一个评委的 Excel 评分文件，不同 judge 给出不同的分数"""
+    import openpyxl
+    workbook = openpyxl.Workbook(write_only=True)
+    worksheet = workbook.create_sheet("Score Template")
+    worksheet.append(['班级/Class', '姓名/Name', '分数/Score'])
+    for i in range(rows):
+        worksheet.append([f"{i % 30 + 1}班", f"学生{i}", round(((i + judge) * 37 % 101) / 10, 1)])
+    output = io.BytesIO()
+    workbook.save(output)
+    return output.getvalue()
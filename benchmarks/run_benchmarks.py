@@ -0,0 +1,243 @@
+"""排行榜读写热点路径的基准测试
+
+对每种数据规模（学生数 × 评委数）启动一个新进程：把合成的科目写入排行榜存储和 SQLite，
+然后在进程内通过 ASGI 调用以下场景，输出 p50/p95/p99 延迟、吞吐量、每个请求的 CPU 时间和峰值 RSS（JSON）：
+
+  page / fullscreen / winners   排行榜页面（渲染缓存命中，即屏幕轮询的常见情况）
+  page_cold / fullscreen_cold   同上，但每次请求前清空渲染缓存（测量实际渲染的开销）
+  upload                        上传一个评委文件（同名文件反复替换）
+  login                         评委登录（bcrypt）
+
+结果中包含提交号和运行参数；用 --compare 与之前保存的结果对比，
+任一场景的 p50 或 p95 超过基准的 --threshold 倍时以非零状态退出，可用于发现性能回退。
+
+用法: python benchmarks/run_benchmarks.py [--students 1000,10000,100000] [--judges 3,50]
+          [--requests 200] [--concurrency 8] [--output result.json] [--compare baseline.json]
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+from asgi_client import ASGIClient  # noqa: E402
+from common import ROOT, peak_rss_mb, percentile, print_worker_result, run_worker, worker_environment  # noqa: E402
+
+SUBJECT = "bench"
+SCENARIOS = ("page", "page_cold", "fullscreen", "fullscreen_cold", "winners", "upload", "login")
+UPLOAD_ROWS = 200
+SEED_BATCH = 10
+
+
+def summarize(latencies, wall_seconds, cpu_seconds, statuses):
+    return {
+        "requests": len(latencies),
+        "errors": sum(1 for status in statuses if status >= 400),
+        "p50_ms": round(statistics.median(latencies) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 3),
+        "max_ms": round(max(latencies) * 1000, 3),
+        "throughput_rps": round(len(latencies) / wall_seconds, 1),
+        # 进程内所有线程的 CPU 时间（包括日志、线程池等后台工作）
+        "cpu_ms_per_request": round(cpu_seconds / len(latencies) * 1000, 3),
+    }
+
+
+async def measure(make_request, requests: int, concurrency: int, before=None):
+    """用 concurrency 个并发任务发出 requests 个请求，返回延迟统计"""
+    latencies, statuses = [], []
+    counter = iter(range(requests))
+
+    async def worker():
+        for index in counter:
+            if before is not None:
+                before()
+            started = time.perf_counter()
+            response = await make_request(index)
+            latencies.append(time.perf_counter() - started)
+            statuses.append(response.status)
+
+    started = time.perf_counter()
+    cpu_started = time.process_time()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, time.perf_counter() - started, time.process_time() - cpu_started, statuses)
+
+
+def seed(store, students: int, judges: int):
+    """写入一个科目：每位评委一个文件，给所有学生打分；同时写入 SQLite"""
+    from backend.merge import merge_sheets
+    from backend.records import save_sheets
+
+    # 每次合并 SEED_BATCH 个评委文件，每个学生只重新计算一次
+    for first in range(0, judges, SEED_BATCH):
+        sheets = {
+            f"judge{judge}.xlsx": {
+                f"{i % 30 + 1}班:学生{i}": [round(((i * 37 + judge * 11) % 101) / 10, 1)]
+                for i in range(students)
+            }
+            for judge in range(first, min(judges, first + SEED_BATCH))
+        }
+        merge_sheets(store, SUBJECT, sheets, uploaded_by="bench_judge")
+        save_sheets(SUBJECT, sheets, "bench_judge")
+
+
+def upload_body():
+    lines = ["班级/Class,姓名/Name,分数/Score"]
+    lines += [f"{i % 30 + 1}班,学生{i},{(i * 13 % 101) / 10}" for i in range(UPLOAD_ROWS)]
+    return "\n".join(lines).encode("utf-8")
+
+
+async def run_scenarios(students: int, judges: int, scenarios, requests: int, concurrency: int,
+                        login_requests: int):
+    import backend.main as main_module
+
+    client = ASGIClient(main_module.app)
+    await client.startup()
+    # 等待启动预热结束，避免与写入数据同时进行
+    while (await client.get("/health")).status != 200:
+        await asyncio.sleep(0.05)
+    await client.login("bench_judge", "bench_password")
+
+    started = time.perf_counter()
+    seed(main_module.redis_client, students, judges)
+    result = {
+        "students": students,
+        "judges": judges,
+        "seed_seconds": round(time.perf_counter() - started, 2),
+        "rss_after_seed_mb": peak_rss_mb(),
+        "scenarios": {},
+    }
+
+    board = f"/leaderboard/{SUBJECT}"
+    body = upload_body()
+    readers = {
+        "page": lambda index: client.get(board),
+        "page_cold": lambda index: client.get(board),
+        "fullscreen": lambda index: client.get(f"{board}/fullscreen"),
+        "fullscreen_cold": lambda index: client.get(f"{board}/fullscreen"),
+        "winners": lambda index: client.get(f"{board}/winners"),
+    }
+    for name in scenarios:
+        if name in readers:
+            before = main_module.render_cache.clear if name.endswith("_cold") else None
+            await readers[name](0)
+            result["scenarios"][name] = await measure(readers[name], requests, concurrency, before)
+        elif name == "upload":
+            async def upload(index):
+                return await client.post_form("/upload_scores", {"subject": SUBJECT},
+                                              files=[("files", "bench_upload.csv", body)])
+            await upload(0)
+            result["scenarios"][name] = await measure(upload, max(1, requests // 10), 1)
+        elif name == "login":
+            async def login(index):
+                return await ASGIClient(main_module.app).post_form(
+                    "/login", {"username": "bench_judge", "password": "bench_password"})
+            result["scenarios"][name] = await measure(login, login_requests, concurrency)
+
+    await client.shutdown()
+    result["peak_rss_mb"] = peak_rss_mb()
+    print_worker_result(result)
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current, baseline, threshold):
+    """返回超过阈值的回退列表"""
+    regressions = []
+    previous = {(run["students"], run["judges"]): run for run in baseline["runs"]}
+    for run in current["runs"]:
+        old_run = previous.get((run["students"], run["judges"]))
+        if old_run is None:
+            continue
+        for name, stats in run["scenarios"].items():
+            old = old_run["scenarios"].get(name)
+            if not old:
+                continue
+            for metric in ("p50_ms", "p95_ms"):
+                if old[metric] > 0 and stats[metric] / old[metric] > threshold:
+                    regressions.append({
+                        "students": run["students"], "judges": run["judges"], "scenario": name,
+                        "metric": metric, "baseline": old[metric], "current": stats[metric],
+                        "ratio": round(stats[metric] / old[metric], 2),
+                    })
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--students", default="1000,10000,100000")
+    parser.add_argument("--judges", default="3,50")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--login-requests", type=int, default=16)
+    parser.add_argument("--output", help="把结果写入文件")
+    parser.add_argument("--compare", help="与之前保存的结果对比")
+    parser.add_argument("--threshold", type=float, default=1.25)
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    scenarios = [name for name in args.scenarios.split(",") if name]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    if args.worker:
+        worker_environment()
+        asyncio.run(run_scenarios(int(args.students), int(args.judges), scenarios, args.requests,
+                                  args.concurrency, args.login_requests))
+        return
+
+    runs = []
+    for students in (int(value) for value in args.students.split(",")):
+        for judges in (int(value) for value in args.judges.split(",")):
+            # 每种规模使用新的进程和数据库，峰值 RSS 互不影响
+            result, _ = run_worker(__file__, [
+                "--students", str(students), "--judges", str(judges), "--scenarios", ",".join(scenarios),
+                "--requests", str(args.requests), "--concurrency", str(args.concurrency),
+                "--login-requests", str(args.login_requests),
+            ])
+            runs.append(result)
+            print(f"students={students} judges={judges} done", file=sys.stderr)
+
+    report = {
+        "benchmark": "hot_paths",
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "parameters": {
+            "requests": args.requests, "concurrency": args.concurrency,
+            "login_requests": args.login_requests, "upload_rows": UPLOAD_ROWS,
+        },
+        "runs": runs,
+    }
+    exit_code = 0
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as baseline_file:
+            baseline = json.load(baseline_file)
+        report["compared_with"] = baseline.get("commit")
+        report["regressions"] = compare(report, baseline, args.threshold)
+        exit_code = 1 if report["regressions"] else 0
+
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output_file:
+            output_file.write(text + "\n")
+    print(text)
+    sys.exit(exit_code)
+
+
+if __name__ == "__main__":
+    main()
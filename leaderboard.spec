@@ -20,7 +20,8 @@ a = Analysis(
         'python-jose',
         'python-multipart',
         'python-dotenv',
-        'httpx'
+        'httpx',
+        'orjson'
     ],
     hookspath=[],
     hooksconfig={},
@@ -1,17 +1,47 @@
 import sys
 import os
+import multiprocessing
 import webbrowser
 import threading
 import time
-from backend.main import app
-import uvicorn
+import urllib.request
+import urllib.error
+
+# 桌面版没有 Redis 服务器，默认把排行榜数据保存在程序旁边的 data 目录，重启后不丢失
+if getattr(sys, 'frozen', False):
+    _app_dir = os.path.dirname(sys.executable)
+else:
+    _app_dir = os.path.dirname(os.path.abspath(__file__))
+os.environ.setdefault("LOCAL_STORE_DIR", os.path.join(_app_dir, "data"))
+
+HOST = "127.0.0.1"
+PORT = 8000
+# 等待服务器就绪的最长时间，超时后仍然打开浏览器
+READY_TIMEOUT = 60
+
+def wait_until_ready(url, timeout=READY_TIMEOUT):
+    """轮询 /health，服务器启动并完成预热（返回 200）后返回 True"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(url, timeout=1) as response:
+                if response.status == 200:
+                    return True
+        except (urllib.error.URLError, OSError):
+            # 服务器还没有开始监听，或者仍在预热（503）
+            pass
+        time.sleep(0.1)
+    return False
 
 def open_browser():
-    """等待服务器启动后打开浏览器"""
-    time.sleep(2)  # 等待服务器启动
-    webbrowser.open('http://localhost:8000')
+    """等待服务器就绪后打开浏览器"""
+    wait_until_ready(f"http://{HOST}:{PORT}/health")
+    webbrowser.open(f'http://localhost:{PORT}')
 
 def main():
+    # 打包后的可执行文件中，解析进程池的子进程需要这一步
+    multiprocessing.freeze_support()
+
     # 设置工作目录
     if getattr(sys, 'frozen', False):
         # 如果是打包后的可执行文件
@@ -20,11 +50,16 @@ def main():
         # 如果是直接运行 Python 脚本
         os.chdir(os.path.dirname(os.path.abspath(__file__)))
 
+    # 在 freeze_support 和切换工作目录之后导入：解析进程池的子进程不需要加载整个应用，
+    # 相对路径的 SQLite 数据库也总是在程序所在目录
+    from backend.main import app
+    import uvicorn
+
     # 启动浏览器线程
     threading.Thread(target=open_browser, daemon=True).start()
 
     # 启动服务器
-    uvicorn.run(app, host="127.0.0.1", port=8000)
+    uvicorn.run(app, host=HOST, port=PORT)
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
@@ -0,0 +1,35 @@
+"""大文件导入期间排行榜读取保持响应：文件解析和合并不能阻塞事件循环
+
+在子进程中启动应用（使用临时数据库），上传两个 Excel 文件的同时不断读取排行榜页面；
+测量由 benchmarks/bench_upload_responsiveness.py 的 --worker 模式完成。
+"""
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCRIPT = os.path.join(ROOT, "benchmarks", "bench_upload_responsiveness.py")
+
+# 单次读取或事件循环的最长停顿不能超过导入耗时的这个比例。
+# 用比例而不是固定的毫秒数，结果与机器快慢无关：解析在进程池中时约为 5%，
+# 在事件循环中直接解析时每个文件都会整段阻塞读取，约为 50% 以上。
+MAX_STALL_FRACTION = 0.25
+# 导入期间至少完成的读取次数
+MIN_READS = 10
+
+
+def test_leaderboard_reads_stay_responsive_during_import():
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, PARSE_WORKERS="2", BENCH_WORKDIR=tmp, STORAGE_BACKEND="local", LOCAL_STORE_DIR="")
+        completed = subprocess.run(
+            [sys.executable, SCRIPT, "--worker", "--rows", "20000", "--files", "2"],
+            check=True, capture_output=True, text=True, cwd=ROOT, env=env, timeout=300,
+        )
+    result = json.loads(completed.stdout.strip().splitlines()[-1])
+
+    assert result["upload_status"] == 303, result
+    assert result["reads_during_upload"] >= MIN_READS, result
+    stall_ms = max(result["read_max_ms"], result["loop_lag_max_ms"])
+    assert stall_ms < MAX_STALL_FRACTION * result["upload_seconds"] * 1000, result